@@ -0,0 +1,186 @@
+import argparse
+import asyncio
+import importlib.util
+import os
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+
+import lambda_async
+
+# Compares the sync handler (one thread per in-flight image) with the asyncio
+# handler (one coroutine per in-flight image) against stub AWS clients that
+# only sleep, so the numbers reflect handler overhead rather than AWS latency.
+
+FACE = {
+    'AgeRange': {'Low': 25, 'High': 35},
+    'Gender': {'Value': 'Female', 'Confidence': 99.91234},
+    'Emotions': [
+        {'Type': 'CALM', 'Confidence': 95.1234},
+        {'Type': 'HAPPY', 'Confidence': 3.4567},
+        {'Type': 'SURPRISED', 'Confidence': 0.8123}
+    ]
+}
+MATCH = {'FaceMatches': [{'Similarity': 99.5, 'Face': {'ExternalImageId': 'emp-0001'}}]}
+
+
+def load_sync_handler():
+    """Import lambda-func.py, which cannot be imported by name"""
+    spec = importlib.util.spec_from_file_location('lambda_function', 'lambda-func.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class StubRekognition:
+    def __init__(self, latency):
+        self.latency = latency
+
+    def detect_faces(self, **kwargs):
+        time.sleep(self.latency)
+        return {'FaceDetails': [FACE]}
+
+    def search_faces_by_image(self, **kwargs):
+        time.sleep(self.latency)
+        return MATCH
+
+
+class StubTable:
+    def __init__(self, latency):
+        self.latency = latency
+
+    def put_item(self, **kwargs):
+        time.sleep(self.latency)
+
+
+class StubDynamoResource:
+    def __init__(self, latency):
+        self.table = StubTable(latency)
+
+    def Table(self, name):
+        return self.table
+
+
+class StubSns:
+    def __init__(self, latency):
+        self.latency = latency
+
+    def publish(self, **kwargs):
+        time.sleep(self.latency)
+
+
+class AsyncStubRekognition:
+    def __init__(self, latency):
+        self.latency = latency
+
+    async def detect_faces(self, **kwargs):
+        await asyncio.sleep(self.latency)
+        return {'FaceDetails': [FACE]}
+
+    async def search_faces_by_image(self, **kwargs):
+        await asyncio.sleep(self.latency)
+        return MATCH
+
+
+class AsyncStubDynamo:
+    def __init__(self, latency):
+        self.latency = latency
+
+    async def put_item(self, **kwargs):
+        await asyncio.sleep(self.latency)
+
+
+class AsyncStubSns:
+    def __init__(self, latency):
+        self.latency = latency
+
+    async def publish(self, **kwargs):
+        await asyncio.sleep(self.latency)
+
+
+def make_event(i):
+    return {'Records': [{'s3': {'bucket': {'name': 'bench-bucket'}, 'object': {'key': f'img-{i}.jpg'}}}]}
+
+
+def bench_sync(handler, events, in_flight):
+    with ThreadPoolExecutor(max_workers=in_flight) as pool:
+        start = time.perf_counter()
+        results = list(pool.map(lambda event: handler.lambda_handler(event, None), events))
+        elapsed = time.perf_counter() - start
+    return results, elapsed
+
+
+def bench_async(events, in_flight):
+    semaphore = asyncio.Semaphore(in_flight)
+
+    async def one(event):
+        async with semaphore:
+            return await lambda_async.handle_event(event, None)
+
+    async def run():
+        start = time.perf_counter()
+        results = await asyncio.gather(*(one(event) for event in events))
+        return results, time.perf_counter() - start
+
+    return lambda_async.get_loop().run_until_complete(run())
+
+
+def measure(fn, *args):
+    """Run fn under tracemalloc and return (results, seconds, peak bytes)
+
+    Only Python allocations are traced; the native stack of each sync worker
+    thread is not included, so the sync figures are a lower bound.
+    """
+    tracemalloc.start()
+    try:
+        results, elapsed = fn(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return results, elapsed, peak
+
+
+def run_benchmark(images, in_flight_levels, latency):
+    handler = load_sync_handler()
+    handler.rekognition = StubRekognition(latency)
+    handler.dynamodb = StubDynamoResource(latency)
+    handler.sns = StubSns(latency)
+    lambda_async.set_clients({
+        'rekognition': AsyncStubRekognition(latency),
+        'dynamodb': AsyncStubDynamo(latency),
+        'sns': AsyncStubSns(latency)
+    })
+
+    events = [make_event(i) for i in range(images)]
+
+    def run(in_flight):
+        with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+            sync_results, sync_elapsed, sync_peak = measure(bench_sync, handler, events, in_flight)
+            async_results, async_elapsed, async_peak = measure(bench_async, events, in_flight)
+        if sync_results != async_results:
+            print(f"Warning: sync and async responses differ at in-flight={in_flight}")
+        return {'sync': (sync_elapsed, sync_peak), 'async': (async_elapsed, async_peak)}
+
+    # Peak memory at one image in flight is mostly fixed overhead (events,
+    # results, module state); the cost per in-flight image is the slope above it
+    baseline = run(1)
+    print(f"{images} images, stub latency {latency * 1000:.0f} ms per call")
+    print(f"{'mode':<6} {'in-flight':>9} {'images/s':>10} {'peak KiB':>10} {'KiB/image':>10}")
+    for in_flight in in_flight_levels:
+        measured = baseline if in_flight == 1 else run(in_flight)
+        for mode in ('sync', 'async'):
+            elapsed, peak = measured[mode]
+            if in_flight > 1:
+                per_image = f"{(peak - baseline[mode][1]) / 1024 / (in_flight - 1):>10.2f}"
+            else:
+                per_image = f"{'-':>10}"
+            print(f"{mode:<6} {in_flight:>9} {images / elapsed:>10.1f} {peak / 1024:>10.1f} {per_image}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark sync vs asyncio Lambda handler on stub clients")
+    parser.add_argument('--images', type=int, default=500)
+    parser.add_argument('--in-flight', type=int, nargs='+', default=[1, 8, 32, 128])
+    parser.add_argument('--latency-ms', type=float, default=20.0)
+    args = parser.parse_args()
+    run_benchmark(args.images, args.in_flight, args.latency_ms / 1000)
@@ -0,0 +1,84 @@
+import argparse
+import io
+import os
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+import numpy as np
+
+from bench_async import StubDynamoResource, StubSns, load_sync_handler
+from local_backend import LocalBackend
+
+# Load test for the sync handler on the local CPU backend: no AWS calls at all.
+# Enrolls random embeddings, writes probe images as .npy files (half are noisy
+# copies of enrolled faces, half are strangers) and pushes S3 events for them
+# through lambda_handler with stub DynamoDB and SNS clients.
+
+BUCKET = 'bench-bucket'
+
+
+def npy_bytes(vector):
+    buffer = io.BytesIO()
+    np.save(buffer, vector.astype(np.float32))
+    return buffer.getvalue()
+
+
+def write_probes(image_dir, enrolled, probes, noise, rng):
+    """Write probe images and return (keys, number expected to match)"""
+    os.makedirs(os.path.join(image_dir, BUCKET), exist_ok=True)
+    keys = []
+    known = probes // 2
+    for i in range(probes):
+        if i < known:
+            vector = enrolled[rng.integers(len(enrolled))] + rng.normal(0, noise, enrolled.shape[1])
+        else:
+            vector = rng.standard_normal(enrolled.shape[1])
+        key = f'probe-{i}.npy'
+        with open(os.path.join(image_dir, BUCKET, key), 'wb') as f:
+            f.write(npy_bytes(vector))
+        keys.append(key)
+    return keys, known
+
+
+def run_benchmark(face_counts, probes, dim, noise):
+    handler = load_sync_handler()
+    handler.dynamodb = StubDynamoResource(0)
+    handler.sns = StubSns(0)
+    rng = np.random.default_rng(0)
+
+    print(f"{probes} images per run, {dim}-d embeddings")
+    print(f"{'faces':>8} {'images/s':>10} {'search ms':>10} {'matched':>8} {'expected':>8}")
+    for face_count in face_counts:
+        with tempfile.TemporaryDirectory() as image_dir:
+            backend = LocalBackend(dim=dim, image_dir=image_dir)
+            enrolled = rng.standard_normal((face_count, dim)).astype(np.float32)
+            backend.add_embeddings(enrolled, [f'emp-{i}' for i in range(face_count)])
+            keys, expected = write_probes(image_dir, enrolled, probes, noise, rng)
+            handler.rekognition = backend
+
+            matched = 0
+            start = time.perf_counter()
+            with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+                for key in keys:
+                    event = {'Records': [{'s3': {'bucket': {'name': BUCKET}, 'object': {'key': key}}}]}
+                    matched += '"matched": true' in handler.lambda_handler(event, None)['body']
+            elapsed = time.perf_counter() - start
+
+            query = {'S3Object': {'Bucket': BUCKET, 'Name': keys[0]}}
+            search_start = time.perf_counter()
+            for _ in range(20):
+                backend.search_faces_by_image(CollectionId='bench', Image=query, MaxFaces=1, FaceMatchThreshold=90)
+            search_ms = (time.perf_counter() - search_start) / 20 * 1000
+
+        print(f"{face_count:>8} {probes / elapsed:>10.1f} {search_ms:>10.3f} {matched:>8} {expected:>8}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test lambda_handler on the local CPU face matcher")
+    parser.add_argument('--faces', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--images', type=int, default=2000)
+    parser.add_argument('--dim', type=int, default=128)
+    parser.add_argument('--noise', type=float, default=0.1, help="Std-dev of noise added to enrolled faces")
+    args = parser.parse_args()
+    run_benchmark(args.faces, args.images, args.dim, args.noise)
@@ -1,6 +1,8 @@
 import boto3
 import json
 
+from deploy_lambda import LAMBDA_ALIAS, qualifier_args
+
 s3_client = boto3.client('s3', region_name='us-east-2')
 lambda_client = boto3.client('lambda', region_name='us-east-2')
 
@@ -10,7 +12,8 @@ LAMBDA_FUNCTION_NAME = 'FaceProcessor'
 def get_lambda_function_arn():
     """Get the ARN of the Lambda function"""
     try:
-        response = lambda_client.get_function(FunctionName=LAMBDA_FUNCTION_NAME)
+        # Qualified with LAMBDA_ALIAS when warm-up uses provisioned concurrency
+        response = lambda_client.get_function(FunctionName=LAMBDA_FUNCTION_NAME, **qualifier_args())
         return response['Configuration']['FunctionArn']
     except lambda_client.exceptions.ResourceNotFoundException:
         print(f"Error: Lambda function '{LAMBDA_FUNCTION_NAME}' not found.")
@@ -26,7 +29,7 @@ def add_lambda_permission():
     try:
         # Check if permission already exists by getting the policy
         try:
-            policy_response = lambda_client.get_policy(FunctionName=LAMBDA_FUNCTION_NAME)
+            policy_response = lambda_client.get_policy(FunctionName=LAMBDA_FUNCTION_NAME, **qualifier_args())
             policy = json.loads(policy_response['Policy'])
             # Check if our statement already exists
             statement_id = 's3-trigger-permission'
@@ -45,7 +48,8 @@ def add_lambda_permission():
                 StatementId='s3-trigger-permission',
                 Action='lambda:InvokeFunction',
                 Principal='s3.amazonaws.com',
-                SourceArn=f'arn:aws:s3:::{BUCKET_NAME}'
+                SourceArn=f'arn:aws:s3:::{BUCKET_NAME}',
+                **qualifier_args()
             )
             print(f"Added permission for S3 bucket '{BUCKET_NAME}' to invoke Lambda function.")
             return True
@@ -86,18 +90,30 @@ def configure_s3_event_notification():
     # Merge with existing Lambda configurations if any
     lambda_configurations = current_config.get('LambdaFunctionConfigurations', [])
     
+    # Drop triggers for this function under another qualifier (e.g. after
+    # switching to an alias), since S3 rejects overlapping configurations
+    function_marker = f':function:{LAMBDA_FUNCTION_NAME}'
+    configuration_count = len(lambda_configurations)
+    lambda_configurations = [
+        cfg for cfg in lambda_configurations
+        if cfg['LambdaFunctionArn'] == lambda_arn
+        or not (cfg['LambdaFunctionArn'].endswith(function_marker)
+                or f'{function_marker}:' in cfg['LambdaFunctionArn'])
+    ]
+    
     # Check if configuration already exists
     existing_config = next(
         (cfg for cfg in lambda_configurations if cfg['LambdaFunctionArn'] == lambda_arn),
         None
     )
     
-    if existing_config:
+    if existing_config and len(lambda_configurations) == configuration_count:
         print("S3 event notification already configured.")
         return True
     
     # Add new Lambda configuration
-    lambda_configurations.append(lambda_config)
+    if not existing_config:
+        lambda_configurations.append(lambda_config)
     
     # Prepare notification configuration
     notification_config = {
@@ -119,7 +135,8 @@ def configure_s3_event_notification():
             NotificationConfiguration=notification_config
         )
         print(f"S3 event notification configured successfully.")
-        print(f"Bucket '{BUCKET_NAME}' will now trigger Lambda '{LAMBDA_FUNCTION_NAME}' on object creation.")
+        target = f"{LAMBDA_FUNCTION_NAME}:{LAMBDA_ALIAS}" if LAMBDA_ALIAS else LAMBDA_FUNCTION_NAME
+        print(f"Bucket '{BUCKET_NAME}' will now trigger Lambda '{target}' on object creation.")
         return True
     except Exception as e:
         print(f"Error configuring S3 event notification: {str(e)}")
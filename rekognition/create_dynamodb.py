@@ -3,6 +3,22 @@ from botocore.exceptions import ClientError
 
 dynamodb = boto3.client('dynamodb', region_name='us-east-2')
 table_name = 'FaceMetadata'
+cache_table_name = 'FaceMatchCache'
+
+# New images feed the throughput monitor (throughput_stream.py)
+stream_specification = {'StreamEnabled': True, 'StreamViewType': 'NEW_IMAGE'}
+
+def enable_stream(response):
+    """Turn on the FaceMetadata stream for a table created before it was needed"""
+    if response['Table'].get('StreamSpecification', {}).get('StreamEnabled'):
+        return True
+    try:
+        dynamodb.update_table(TableName=table_name, StreamSpecification=stream_specification)
+        print(f"DynamoDB stream enabled on '{table_name}'.")
+        return True
+    except ClientError as e:
+        print(f"Error enabling DynamoDB stream: {e}")
+        return False
 
 def create_table():
     try:
@@ -10,7 +26,7 @@ def create_table():
         try:
             response = dynamodb.describe_table(TableName=table_name)
             print(f"DynamoDB table '{table_name}' already exists.")
-            return True
+            return enable_stream(response)
         except ClientError as e:
             error_code = e.response['Error']['Code']
             if error_code != 'ResourceNotFoundException':
@@ -22,7 +38,8 @@ def create_table():
             TableName=table_name,
             KeySchema=[{'AttributeName': 'FaceId', 'KeyType': 'HASH'}],
             AttributeDefinitions=[{'AttributeName': 'FaceId', 'AttributeType': 'S'}],
-            BillingMode='PAY_PER_REQUEST'
+            BillingMode='PAY_PER_REQUEST',
+            StreamSpecification=stream_specification
         )
         print(f"DynamoDB table '{table_name}' created successfully.")
         return True
@@ -35,5 +52,42 @@ def create_table():
             print(f"Error creating DynamoDB table: {e}")
             return False
 
+def create_cache_table():
+    """Create the match-result cache table (collection version + cached matches)"""
+    try:
+        try:
+            dynamodb.describe_table(TableName=cache_table_name)
+            print(f"DynamoDB table '{cache_table_name}' already exists.")
+            return True
+        except ClientError as e:
+            error_code = e.response['Error']['Code']
+            if error_code != 'ResourceNotFoundException':
+                print(f"Error checking table: {error_code}")
+                return False
+        
+        dynamodb.create_table(
+            TableName=cache_table_name,
+            KeySchema=[{'AttributeName': 'CacheKey', 'KeyType': 'HASH'}],
+            AttributeDefinitions=[{'AttributeName': 'CacheKey', 'AttributeType': 'S'}],
+            BillingMode='PAY_PER_REQUEST'
+        )
+        dynamodb.get_waiter('table_exists').wait(TableName=cache_table_name)
+        # Cached matches expire on their own; the version item has no ExpiresAt
+        dynamodb.update_time_to_live(
+            TableName=cache_table_name,
+            TimeToLiveSpecification={'Enabled': True, 'AttributeName': 'ExpiresAt'}
+        )
+        print(f"DynamoDB table '{cache_table_name}' created successfully.")
+        return True
+    except ClientError as e:
+        error_code = e.response['Error']['Code']
+        if error_code == 'ResourceInUseException':
+            print(f"DynamoDB table '{cache_table_name}' already exists.")
+            return True
+        else:
+            print(f"Error creating DynamoDB table: {e}")
+            return False
+
 if __name__ == "__main__":
     create_table()
+    create_cache_table()
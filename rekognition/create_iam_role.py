@@ -1,5 +1,6 @@
 import boto3
 import json
+import os
 from botocore.exceptions import ClientError
 
 iam = boto3.client('iam')
@@ -64,7 +65,9 @@ def create_lambda_role():
                 "Action": [
                     "dynamodb:PutItem",
                     "dynamodb:GetItem",
+                    "dynamodb:BatchGetItem",
                     "dynamodb:UpdateItem",
+                    "dynamodb:DeleteItem",
                     "dynamodb:DescribeTable"
                 ],
                 "Resource": f"arn:aws:dynamodb:us-east-2:{account_id}:table/FaceMetadata"
@@ -72,7 +75,27 @@ def create_lambda_role():
             {
                 "Effect": "Allow",
                 "Action": [
-                    "sns:Publish"
+                    "dynamodb:DescribeStream",
+                    "dynamodb:GetRecords",
+                    "dynamodb:GetShardIterator",
+                    "dynamodb:ListStreams"
+                ],
+                "Resource": f"arn:aws:dynamodb:us-east-2:{account_id}:table/FaceMetadata/stream/*"
+            },
+            {
+                "Effect": "Allow",
+                "Action": [
+                    "dynamodb:GetItem",
+                    "dynamodb:BatchGetItem",
+                    "dynamodb:PutItem"
+                ],
+                "Resource": f"arn:aws:dynamodb:us-east-2:{account_id}:table/FaceMatchCache"
+            },
+            {
+                "Effect": "Allow",
+                "Action": [
+                    "sns:Publish",
+                    "sns:GetTopicAttributes"
                 ],
                 "Resource": f"arn:aws:sns:us-east-2:{account_id}:FaceDetectedTopic"
             },
@@ -86,6 +109,20 @@ def create_lambda_role():
         ]
     }
     
+    # Allow writing .prof files (profiling.py) and the throughput summary
+    # (throughput_stream.py) when they are configured
+    for uri_variable in ('PROFILE_S3_URI', 'SUMMARY_S3_URI'):
+        uri = os.environ.get(uri_variable, '')
+        if uri.startswith('s3://'):
+            target_bucket = uri[len('s3://'):].split('/')[0]
+            policy_document["Statement"].append({
+                "Effect": "Allow",
+                "Action": [
+                    "s3:PutObject"
+                ],
+                "Resource": f"arn:aws:s3:::{target_bucket}/*"
+            })
+    
     try:
         # Check if role already exists
         try:
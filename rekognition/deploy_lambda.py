@@ -1,4 +1,5 @@
 import boto3
+import json
 import zipfile
 import os
 from botocore.exceptions import ClientError
@@ -6,7 +7,61 @@ from botocore.exceptions import ClientError
 lambda_client = boto3.client('lambda', region_name='us-east-2')
 iam = boto3.client('iam')
 sts = boto3.client('sts')
+events_client = boto3.client('events', region_name='us-east-2')
+autoscaling = boto3.client('application-autoscaling', region_name='us-east-2')
+dynamodb = boto3.client('dynamodb', region_name='us-east-2')
 role_name = 'lambda-role-FaceProcessor'
+FUNCTION_NAME = 'FaceProcessor'
+STREAM_FUNCTION_NAME = 'FaceThroughputMonitor'
+
+# Modules packaged next to lambda_function.py in the deployment zip
+LAMBDA_MODULES = [
+    'face_results.py', 'lambda_async.py', 'profiling.py', 'match_cache.py', 'recognition_backend.py', 's3_uri.py'
+]
+
+# Set LAMBDA_HANDLER=lambda_async.lambda_handler to deploy the asyncio handler;
+# it needs aiobotocore, provided through a layer listed in LAMBDA_LAYERS.
+LAMBDA_HANDLER = os.environ.get('LAMBDA_HANDLER', 'lambda_function.lambda_handler')
+LAMBDA_LAYERS = [arn for arn in os.environ.get('LAMBDA_LAYERS', '').split(',') if arn]
+
+# Optional settings passed through to the function when set at deploy time
+PASSTHROUGH_VARIABLES = [
+    'PROFILE_SAMPLE_RATE', 'PROFILE_TOP_N', 'PROFILE_S3_URI',
+    'MATCH_CACHE', 'MATCH_CACHE_TABLE', 'MATCH_CACHE_SIZE', 'MATCH_CACHE_TTL_SECONDS'
+]
+
+def lambda_environment():
+    """Environment variables for the Lambda function"""
+    variables = {
+        'DYNAMO_TABLE': 'FaceMetadata',
+        'SNS_TOPIC_ARN': 'arn:aws:sns:us-east-2:094092120892:FaceDetectedTopic',
+        'REKOGNITION_COLLECTION': 'employeeFaces'
+    }
+    for name in PASSTHROUGH_VARIABLES:
+        if os.environ.get(name):
+            variables[name] = os.environ[name]
+    return {'Variables': variables}
+
+# Stream consumer that maintains the throughput summary (throughput_stream.py)
+STREAM_MODULES = ['throughput_stream.py', 'face_results.py', 's3_uri.py']
+STREAM_VARIABLES = ['SUMMARY_KEY', 'SUMMARY_INTERVAL_SECONDS', 'SUMMARY_S3_URI', 'LATENCY_WINDOW', 'CAMERA_WINDOW']
+# Only upload items carry ImageKey, so the monitor is not invoked for its own
+# summary#... writes (or for deletes)
+STREAM_FILTER = {'Filters': [{'Pattern': json.dumps({
+    'eventName': ['INSERT', 'MODIFY'],
+    'dynamodb': {'NewImage': {'ImageKey': {'S': [{'exists': True}]}}}
+})}]}
+
+# Keep the function warm during business hours (UTC hour range, inclusive):
+#   WARMUP_MODE=schedule     EventBridge sends {"warmup": true} every WARMUP_INTERVAL_MINUTES
+#   WARMUP_MODE=provisioned  PROVISIONED_CONCURRENCY environments on alias LAMBDA_ALIAS
+WARMUP_MODE = os.environ.get('WARMUP_MODE', '')
+BUSINESS_HOURS_UTC = os.environ.get('BUSINESS_HOURS_UTC', '10-23')  # 6 a.m.-8 p.m. US Eastern (EDT)
+BUSINESS_DAYS = os.environ.get('BUSINESS_DAYS', 'MON-FRI')
+WARMUP_INTERVAL_MINUTES = int(os.environ.get('WARMUP_INTERVAL_MINUTES', '5'))
+PROVISIONED_CONCURRENCY = int(os.environ.get('PROVISIONED_CONCURRENCY', '1'))
+# Provisioned concurrency only applies to a version or alias, so S3 must invoke the alias
+LAMBDA_ALIAS = os.environ.get('LAMBDA_ALIAS') or ('live' if WARMUP_MODE == 'provisioned' else '')
 
 def get_role_arn():
     """Get the IAM role ARN for Lambda function"""
@@ -36,18 +91,21 @@ def deploy_lambda():
     role_arn = get_role_arn()
     print(f"Using IAM Role ARN: {role_arn}")
     
-    # Check if lambda-func.py exists
+    # Check if lambda-func.py and its modules exist
     lambda_file = 'lambda-func.py'
-    if not os.path.exists(lambda_file):
-        print(f"Error: {lambda_file} not found in current directory.")
-        print(f"Current directory: {os.getcwd()}")
-        return False
+    for required_file in [lambda_file] + LAMBDA_MODULES:
+        if not os.path.exists(required_file):
+            print(f"Error: {required_file} not found in current directory.")
+            print(f"Current directory: {os.getcwd()}")
+            return False
     
     # Zip the lambda function
     zip_file = 'lambda.zip'
     try:
         with zipfile.ZipFile(zip_file, 'w', zipfile.ZIP_DEFLATED) as z:
             z.write(lambda_file, 'lambda_function.py')  # Write as lambda_function.py in zip
+            for module_file in LAMBDA_MODULES:
+                z.write(module_file, module_file)
         
         with open(zip_file, 'rb') as f:
             zipped_code = f.read()
@@ -58,17 +116,12 @@ def deploy_lambda():
                 FunctionName='FaceProcessor',
                 Runtime='python3.9',
                 Role=role_arn,
-                Handler='lambda_function.lambda_handler',
+                Handler=LAMBDA_HANDLER,
                 Code={'ZipFile': zipped_code},
+                Layers=LAMBDA_LAYERS,
                 Timeout=30,  # Increased timeout for Rekognition processing
                 MemorySize=256,  # Increased memory for better performance
-                Environment={
-                    'Variables': {
-                        'DYNAMO_TABLE': 'FaceMetadata',
-                        'SNS_TOPIC_ARN': 'arn:aws:sns:us-east-2:094092120892:FaceDetectedTopic',
-                        'REKOGNITION_COLLECTION': 'employeeFaces'
-                    }
-                }
+                Environment=lambda_environment()
             )
             print("Lambda function created successfully.")
         except lambda_client.exceptions.ResourceConflictException:
@@ -80,15 +133,11 @@ def deploy_lambda():
             # Update environment variables and configuration
             lambda_client.update_function_configuration(
                 FunctionName='FaceProcessor',
+                Handler=LAMBDA_HANDLER,
+                Layers=LAMBDA_LAYERS,
                 Timeout=30,
                 MemorySize=256,
-                Environment={
-                    'Variables': {
-                        'DYNAMO_TABLE': 'FaceMetadata',
-                        'SNS_TOPIC_ARN': 'arn:aws:sns:us-east-2:094092120892:FaceDetectedTopic',
-                        'REKOGNITION_COLLECTION': 'employeeFaces'
-                    }
-                }
+                Environment=lambda_environment()
             )
             print("Lambda function code and configuration updated successfully.")
         except lambda_client.exceptions.InvalidParameterValueException as e:
@@ -107,7 +156,9 @@ def deploy_lambda():
             print(f"Error deploying Lambda function: {str(e)}")
             return False
         
-        return True
+        if LAMBDA_ALIAS and not publish_alias():
+            return False
+        return configure_warmup()
     except Exception as e:
         print(f"Error creating Lambda package: {str(e)}")
         return False
@@ -117,5 +168,253 @@ def deploy_lambda():
             os.remove(zip_file)
             print("Cleanup: Removed lambda.zip")
 
+def qualifier_args():
+    """Extra arguments that target LAMBDA_ALIAS when one is configured"""
+    return {'Qualifier': LAMBDA_ALIAS} if LAMBDA_ALIAS else {}
+
+def business_hours():
+    """Return (start_hour, end_hour) from BUSINESS_HOURS_UTC"""
+    start, end = BUSINESS_HOURS_UTC.split('-')
+    return int(start), int(end)
+
+def publish_alias():
+    """Publish the deployed code as a version and point LAMBDA_ALIAS at it"""
+    try:
+        lambda_client.get_waiter('function_updated').wait(FunctionName=FUNCTION_NAME)
+        version = lambda_client.publish_version(FunctionName=FUNCTION_NAME)['Version']
+        try:
+            lambda_client.create_alias(FunctionName=FUNCTION_NAME, Name=LAMBDA_ALIAS, FunctionVersion=version)
+        except lambda_client.exceptions.ResourceConflictException:
+            lambda_client.update_alias(FunctionName=FUNCTION_NAME, Name=LAMBDA_ALIAS, FunctionVersion=version)
+        print(f"Alias '{LAMBDA_ALIAS}' now points to version {version}.")
+        return True
+    except Exception as e:
+        print(f"Error publishing alias '{LAMBDA_ALIAS}': {str(e)}")
+        return False
+
+def configure_warmup_schedule():
+    """Send warm-up events to the function during business hours"""
+    start, end = business_hours()
+    rule_name = f'{FUNCTION_NAME}-warmup'
+    function_arn = lambda_client.get_function(FunctionName=FUNCTION_NAME, **qualifier_args())['Configuration']['FunctionArn']
+
+    rule_arn = events_client.put_rule(
+        Name=rule_name,
+        ScheduleExpression=f'cron(0/{WARMUP_INTERVAL_MINUTES} {start}-{end} ? * {BUSINESS_DAYS} *)',
+        State='ENABLED',
+        Description=f'Keep {FUNCTION_NAME} warm during business hours'
+    )['RuleArn']
+    try:
+        lambda_client.add_permission(
+            FunctionName=FUNCTION_NAME,
+            StatementId='warmup-schedule-permission',
+            Action='lambda:InvokeFunction',
+            Principal='events.amazonaws.com',
+            SourceArn=rule_arn,
+            **qualifier_args()
+        )
+    except lambda_client.exceptions.ResourceConflictException:
+        pass  # Permission already exists
+    events_client.put_targets(
+        Rule=rule_name,
+        Targets=[{'Id': 'warmup', 'Arn': function_arn, 'Input': json.dumps({'warmup': True})}]
+    )
+    print(f"Warm-up schedule '{rule_name}' sends events every {WARMUP_INTERVAL_MINUTES} min, "
+          f"{start}:00-{end}:59 UTC {BUSINESS_DAYS}.")
+
+def configure_provisioned_concurrency():
+    """Scale provisioned concurrency on the alias up and down around business hours"""
+    start, end = business_hours()
+    resource_id = f'function:{FUNCTION_NAME}:{LAMBDA_ALIAS}'
+    dimension = 'lambda:function:ProvisionedConcurrency'
+
+    autoscaling.register_scalable_target(
+        ServiceNamespace='lambda',
+        ResourceId=resource_id,
+        ScalableDimension=dimension,
+        MinCapacity=0,
+        MaxCapacity=PROVISIONED_CONCURRENCY
+    )
+    autoscaling.put_scheduled_action(
+        ServiceNamespace='lambda',
+        ScheduledActionName=f'{FUNCTION_NAME}-business-hours-start',
+        ResourceId=resource_id,
+        ScalableDimension=dimension,
+        Schedule=f'cron(0 {start} ? * {BUSINESS_DAYS} *)',
+        ScalableTargetAction={'MinCapacity': PROVISIONED_CONCURRENCY, 'MaxCapacity': PROVISIONED_CONCURRENCY}
+    )
+    # Scale in every day so a Friday evening is not skipped
+    autoscaling.put_scheduled_action(
+        ServiceNamespace='lambda',
+        ScheduledActionName=f'{FUNCTION_NAME}-business-hours-end',
+        ResourceId=resource_id,
+        ScalableDimension=dimension,
+        Schedule=f'cron(0 {(end + 1) % 24} * * ? *)',
+        ScalableTargetAction={'MinCapacity': 0, 'MaxCapacity': 0}
+    )
+    print(f"Provisioned concurrency {PROVISIONED_CONCURRENCY} on alias '{LAMBDA_ALIAS}', "
+          f"{start}:00-{end}:59 UTC {BUSINESS_DAYS}.")
+
+def remove_warmup_schedule():
+    """Delete the warm-up rule, its targets and the permissions it was granted"""
+    rule_name = f'{FUNCTION_NAME}-warmup'
+    try:
+        targets = events_client.list_targets_by_rule(Rule=rule_name)['Targets']
+    except events_client.exceptions.ResourceNotFoundException:
+        return  # No schedule to remove
+    for target in targets:
+        # Target ARNs end in :<alias> when the schedule invoked an alias
+        parts = target['Arn'].split(':')
+        qualifier = {'Qualifier': parts[7]} if len(parts) > 7 else {}
+        try:
+            lambda_client.remove_permission(
+                FunctionName=FUNCTION_NAME,
+                StatementId='warmup-schedule-permission',
+                **qualifier
+            )
+        except lambda_client.exceptions.ResourceNotFoundException:
+            pass  # Permission already removed
+    if targets:
+        events_client.remove_targets(Rule=rule_name, Ids=[target['Id'] for target in targets])
+    events_client.delete_rule(Name=rule_name)
+    print(f"Warm-up schedule '{rule_name}' removed.")
+
+def remove_provisioned_concurrency(keep=None):
+    """Remove the business-hours scaling from every alias except resource id `keep`"""
+    dimension = 'lambda:function:ProvisionedConcurrency'
+    action_names = [f'{FUNCTION_NAME}-business-hours-start', f'{FUNCTION_NAME}-business-hours-end']
+    resource_ids = []
+    for page in autoscaling.get_paginator('describe_scalable_targets').paginate(
+        ServiceNamespace='lambda', ScalableDimension=dimension
+    ):
+        resource_ids.extend(
+            target['ResourceId'] for target in page['ScalableTargets']
+            if target['ResourceId'].startswith(f'function:{FUNCTION_NAME}:') and target['ResourceId'] != keep
+        )
+
+    for resource_id in resource_ids:
+        actions = autoscaling.describe_scheduled_actions(
+            ServiceNamespace='lambda',
+            ScheduledActionNames=action_names,
+            ResourceId=resource_id,
+            ScalableDimension=dimension
+        )['ScheduledActions']
+        for action in actions:
+            autoscaling.delete_scheduled_action(
+                ServiceNamespace='lambda',
+                ScheduledActionName=action['ScheduledActionName'],
+                ResourceId=resource_id,
+                ScalableDimension=dimension
+            )
+        autoscaling.deregister_scalable_target(
+            ServiceNamespace='lambda',
+            ResourceId=resource_id,
+            ScalableDimension=dimension
+        )
+        # Deregistering leaves the current allocation in place, so release it too
+        alias = resource_id.split(':')[-1]
+        try:
+            lambda_client.delete_provisioned_concurrency_config(FunctionName=FUNCTION_NAME, Qualifier=alias)
+        except lambda_client.exceptions.ProvisionedConcurrencyConfigNotFoundException:
+            pass
+        print(f"Provisioned concurrency scaling removed from alias '{alias}'.")
+
+def configure_warmup():
+    """Apply WARMUP_MODE and remove whatever warming the mode does not use"""
+    if WARMUP_MODE not in ('', 'schedule', 'provisioned'):
+        print(f"Error: unknown WARMUP_MODE '{WARMUP_MODE}' (expected 'schedule' or 'provisioned').")
+        return False
+    try:
+        # Tear down resources left by a previous mode (or alias) first
+        if WARMUP_MODE != 'schedule':
+            remove_warmup_schedule()
+        keep = f'function:{FUNCTION_NAME}:{LAMBDA_ALIAS}' if WARMUP_MODE == 'provisioned' else None
+        remove_provisioned_concurrency(keep)
+
+        if WARMUP_MODE == 'schedule':
+            configure_warmup_schedule()
+        elif WARMUP_MODE == 'provisioned':
+            configure_provisioned_concurrency()
+        return True
+    except Exception as e:
+        if not WARMUP_MODE:
+            # Nothing was requested, so a failed cleanup does not fail the deploy
+            print(f"Warning: could not check for old warm-up resources: {str(e)}")
+            return True
+        print(f"Error configuring warm-up ({WARMUP_MODE}): {str(e)}")
+        return False
+
+def deploy_stream_consumer():
+    """Deploy FaceThroughputMonitor and subscribe it to the FaceMetadata stream"""
+    role_arn = get_role_arn()
+    for required_file in STREAM_MODULES:
+        if not os.path.exists(required_file):
+            print(f"Error: {required_file} not found in current directory.")
+            return False
+
+    variables = {'DYNAMO_TABLE': 'FaceMetadata'}
+    for name in STREAM_VARIABLES:
+        if os.environ.get(name):
+            variables[name] = os.environ[name]
+
+    zip_file = 'stream.zip'
+    try:
+        with zipfile.ZipFile(zip_file, 'w', zipfile.ZIP_DEFLATED) as z:
+            for module_file in STREAM_MODULES:
+                z.write(module_file, module_file)
+        with open(zip_file, 'rb') as f:
+            zipped_code = f.read()
+
+        try:
+            lambda_client.create_function(
+                FunctionName=STREAM_FUNCTION_NAME,
+                Runtime='python3.9',
+                Role=role_arn,
+                Handler='throughput_stream.lambda_handler',
+                Code={'ZipFile': zipped_code},
+                Timeout=30,
+                MemorySize=128,
+                Environment={'Variables': variables}
+            )
+            print(f"Lambda function '{STREAM_FUNCTION_NAME}' created successfully.")
+        except lambda_client.exceptions.ResourceConflictException:
+            lambda_client.update_function_code(FunctionName=STREAM_FUNCTION_NAME, ZipFile=zipped_code)
+            lambda_client.get_waiter('function_updated').wait(FunctionName=STREAM_FUNCTION_NAME)
+            lambda_client.update_function_configuration(
+                FunctionName=STREAM_FUNCTION_NAME,
+                Environment={'Variables': variables}
+            )
+            print(f"Lambda function '{STREAM_FUNCTION_NAME}' updated successfully.")
+
+        stream_arn = dynamodb.describe_table(TableName='FaceMetadata')['Table'].get('LatestStreamArn')
+        if not stream_arn:
+            print("Error: FaceMetadata has no stream. Run create_dynamodb.py first.")
+            return False
+        mappings = lambda_client.list_event_source_mappings(
+            EventSourceArn=stream_arn,
+            FunctionName=STREAM_FUNCTION_NAME
+        )['EventSourceMappings']
+        if mappings:
+            lambda_client.update_event_source_mapping(UUID=mappings[0]['UUID'], FilterCriteria=STREAM_FILTER)
+            print("FaceMetadata stream already triggers the throughput monitor; filter updated.")
+        else:
+            lambda_client.create_event_source_mapping(
+                EventSourceArn=stream_arn,
+                FunctionName=STREAM_FUNCTION_NAME,
+                StartingPosition='LATEST',
+                BatchSize=100,
+                MaximumBatchingWindowInSeconds=5,
+                FilterCriteria=STREAM_FILTER
+            )
+            print("FaceMetadata stream now triggers the throughput monitor.")
+        return True
+    except Exception as e:
+        print(f"Error deploying throughput monitor: {str(e)}")
+        return False
+    finally:
+        if os.path.exists(zip_file):
+            os.remove(zip_file)
+
 if __name__ == "__main__":
-    deploy_lambda()
\ No newline at end of file
+    deploy_lambda()
+    deploy_stream_consumer()
\ No newline at end of file
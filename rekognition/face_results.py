@@ -0,0 +1,219 @@
+import json
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+
+# Shared by the sync (lambda_function.py) and async (lambda_async.py) handlers
+# so both produce identical FaceMetadata items, notifications and responses.
+
+
+def is_warmup_event(event):
+    """True for the keep-alive event sent by the warm-up schedule"""
+    return isinstance(event, dict) and event.get('warmup') is True
+
+
+def parse_s3_record(event):
+    """Return (bucket, key) of the first S3 record in the event"""
+    record = event['Records'][0]
+    return record['s3']['bucket']['name'], record['s3']['object']['key']
+
+
+def event_time(event):
+    """Return the S3 eventTime (upload time) of the first record, if present"""
+    return event['Records'][0].get('eventTime')
+
+
+def camera_id(key):
+    """Cameras upload under <camera-id>/...; other keys count as 'default'"""
+    return key.split('/', 1)[0] if '/' in key else 'default'
+
+
+def parse_timestamp(value):
+    """Parse an ISO-8601 UTC timestamp such as S3's 2024-01-01T07:00:00.123Z"""
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+class StageTimer:
+    """Record how long each handler stage takes, in milliseconds"""
+
+    def __init__(self):
+        self.start = self.last = time.perf_counter()
+        self.timings = {}
+
+    def mark(self, stage):
+        now = time.perf_counter()
+        self.timings[stage] = (now - self.last) * 1000
+        self.last = now
+
+    def total_ms(self):
+        return (time.perf_counter() - self.start) * 1000
+
+
+def s3_image(bucket, key):
+    """Rekognition Image argument for an object in S3"""
+    return {'S3Object': {'Bucket': bucket, 'Name': key}}
+
+
+def extract_match(match_response):
+    """Return (is_matched, match_info, match_confidence) from search_faces_by_image"""
+    matches = match_response.get('FaceMatches', [])
+    is_matched = len(matches) > 0
+    match_info = matches[0]['Face']['ExternalImageId'] if is_matched else 'No match found'
+    match_confidence = matches[0]['Similarity'] if is_matched else 0
+    return is_matched, match_info, match_confidence
+
+
+def decision_fields(key, uploaded_at, timer):
+    """Camera, upload and decision times and per-stage timings for an item"""
+    decided_at = datetime.now(timezone.utc)
+    timings = {f'{stage}_ms': Decimal(f'{ms:.1f}') for stage, ms in timer.timings.items()}
+    timings['total_ms'] = Decimal(f'{timer.total_ms():.1f}')
+    fields = {
+        'CameraId': camera_id(key),
+        'EventTime': uploaded_at or 'unknown',
+        'DecisionTime': decided_at.isoformat(timespec='milliseconds').replace('+00:00', 'Z'),
+        'StageTimings': timings
+    }
+    if uploaded_at:
+        upload_to_decision = (decided_at - parse_timestamp(uploaded_at)).total_seconds() * 1000
+        fields['UploadToDecisionMs'] = Decimal(f'{upload_to_decision:.1f}')
+    return fields
+
+
+def build_face_item(bucket, key, face, is_matched, match_info, match_confidence, context,
+                    uploaded_at=None, timer=None):
+    """Build the FaceMetadata item for a processed face"""
+    item = {
+        'FaceId': key,
+        'ImageKey': key,
+        'Bucket': bucket,
+        'MatchStatus': 'MATCHED' if is_matched else 'UNMATCHED',
+        'MatchedEmployee': match_info if is_matched else 'N/A',
+        'MatchConfidence': Decimal(str(match_confidence)) if is_matched else Decimal('0'),
+        'AgeRange': {
+            'Low': Decimal(str(face['AgeRange']['Low'])),
+            'High': Decimal(str(face['AgeRange']['High']))
+        },
+        'Gender': {
+            'Value': face['Gender']['Value'],
+            'Confidence': Decimal(str(face['Gender']['Confidence']))
+        },
+        'Emotions': [
+            {
+                'Type': e['Type'],
+                'Confidence': Decimal(str(e['Confidence']))
+            } for e in face['Emotions']
+        ],
+        'ProcessedAt': context.aws_request_id if context else 'unknown'
+    }
+    if timer:
+        item.update(decision_fields(key, uploaded_at, timer))
+    return item
+
+
+def build_status_item(bucket, key, status, context, uploaded_at=None, timer=None, error_message=None):
+    """Build the FaceMetadata item for an upload without a face result (NO_FACE or ERROR)
+
+    Written so every upload is counted on the throughput dashboard, not only
+    the ones that reached a match decision.
+    """
+    item = {
+        'FaceId': key,
+        'ImageKey': key,
+        'Bucket': bucket,
+        'MatchStatus': status,
+        'ProcessedAt': context.aws_request_id if context else 'unknown'
+    }
+    if error_message:
+        item['Error'] = error_message[:1000]
+    if timer:
+        item.update(decision_fields(key, uploaded_at, timer))
+    return item
+
+
+def no_face_notification(bucket, key):
+    """Return (subject, message) for an image without a detectable face"""
+    message = f"""Image Processing Result
+
+Image: {key}
+Bucket: {bucket}
+Status: No face detected
+
+The uploaded image does not contain any detectable faces.
+Access should be denied."""
+    return "🚫 Face Recognition Alert - No Face Detected", message
+
+
+def match_notification(bucket, key, face, is_matched, match_info, match_confidence):
+    """Return (subject, message) for a matched or unmatched face"""
+    if is_matched:
+        # Matched employee - authorized access
+        message = f"""✅ AUTHORIZED ACCESS - Employee Recognized
+
+Image: {key}
+Bucket: {bucket}
+Employee ID: {match_info}
+Match Confidence: {match_confidence:.2f}%
+Status: MATCHED
+
+Face Details:
+- Age Range: {face['AgeRange']['Low']}-{face['AgeRange']['High']} years
+- Gender: {face['Gender']['Value']} (Confidence: {face['Gender']['Confidence']:.2f}%)
+
+Action: Door should be UNLOCKED. Employee is authorized to enter."""
+
+        return "✅ Face Recognition - Authorized Access", message
+
+    # Unmatched face - unauthorized access
+    message = f"""🚫 UNAUTHORIZED ACCESS - Unknown Person
+
+Image: {key}
+Bucket: {bucket}
+Status: UNMATCHED
+Match Result: No matching employee found in database
+
+Face Details:
+- Age Range: {face['AgeRange']['Low']}-{face['AgeRange']['High']} years
+- Gender: {face['Gender']['Value']} (Confidence: {face['Gender']['Confidence']:.2f}%)
+
+Action: Door should remain LOCKED. Unauthorized access attempt detected.
+Security should be notified immediately."""
+
+    return "🚫 Face Recognition - Unauthorized Access Attempt", message
+
+
+def error_notification(bucket, key, error_message):
+    """Return (subject, message) for a processing failure"""
+    message = f"""❌ ERROR - Face Recognition Processing Failed
+
+Image: {key}
+Bucket: {bucket}
+Error: {error_message}
+
+The face recognition pipeline encountered an error while processing the image.
+Please check the Lambda logs for more details."""
+    return "❌ Face Recognition - Processing Error", message
+
+
+def warmup_response(timings):
+    return {'statusCode': 200, 'body': json.dumps({'status': 'warm', 'connect_ms': timings})}
+
+
+def no_face_response():
+    return {'statusCode': 200, 'body': 'No face detected. Notification sent.'}
+
+
+def processed_response(is_matched, match_info, match_confidence):
+    return {
+        'statusCode': 200,
+        'body': json.dumps({
+            'status': 'processed',
+            'matched': is_matched,
+            'employee': match_info,
+            'confidence': match_confidence if is_matched else 0
+        })
+    }
+
+
+def error_response(error_message):
+    return {'statusCode': 500, 'body': f'Error: {error_message}'}
@@ -1,9 +1,14 @@
 import boto3
-import json
 import os
-from decimal import Decimal
+import time
 
-rekognition = boto3.client('rekognition', region_name='us-east-2')
+import face_results
+import recognition_backend
+from match_cache import MatchCache, image_digest
+from profiling import profiled, snapshot_point
+
+# Amazon Rekognition, or the local matcher when RECOGNITION_BACKEND=local
+rekognition = recognition_backend.from_environment()
 dynamodb = boto3.resource('dynamodb', region_name='us-east-2')
 sns = boto3.client('sns', region_name='us-east-2')
 
@@ -12,126 +17,132 @@ DYNAMO_TABLE = os.environ.get('DYNAMO_TABLE', 'FaceMetadata')
 SNS_TOPIC_ARN = os.environ.get('SNS_TOPIC_ARN', 'arn:aws:sns:us-east-2:094092120892:FaceDetectedTopic')
 REKOGNITION_COLLECTION = os.environ.get('REKOGNITION_COLLECTION', 'employeeFaces')
 
+# Optional match-result cache (see match_cache.py); it hashes the image bytes,
+# which are then sent to Rekognition directly when under the 5 MB Bytes limit
+match_cache = MatchCache.from_environment(dynamodb, REKOGNITION_COLLECTION)
+s3 = boto3.client('s3', region_name='us-east-2') if match_cache else None
+MAX_IMAGE_BYTES = 5 * 1024 * 1024
+
+def warm_up():
+    """Open a connection to each service without processing an image"""
+    timings = {}
+    for service, call in (
+        ('rekognition', lambda: rekognition.describe_collection(CollectionId=REKOGNITION_COLLECTION)),
+        ('dynamodb', lambda: dynamodb.Table(DYNAMO_TABLE).load()),
+        ('sns', lambda: sns.get_topic_attributes(TopicArn=SNS_TOPIC_ARN))
+    ):
+        start = time.perf_counter()
+        try:
+            call()
+        except Exception as e:
+            print(f"Warm-up call to {service} failed: {str(e)}")
+        timings[service] = round((time.perf_counter() - start) * 1000, 1)
+    print(f"Warm-up complete: {timings}")
+    return face_results.warmup_response(timings)
+
+@profiled
 def lambda_handler(event, context):
+    # Keep-alive events only warm the container
+    if face_results.is_warmup_event(event):
+        return warm_up()
+
     # Extract bucket and key early for error handling
     bucket = 'Unknown'
     key = 'Unknown'
+    timer = None
+    item_written = False
     try:
-        record = event['Records'][0]
-        bucket = record['s3']['bucket']['name']
-        key = record['s3']['object']['key']
+        bucket, key = face_results.parse_s3_record(event)
         print(f"Processing image: {key} from bucket: {bucket}")
+        timer = face_results.StageTimer()
+
+        image = face_results.s3_image(bucket, key)
+        image_hash = None
+        if match_cache:
+            image_bytes = s3.get_object(Bucket=bucket, Key=key)['Body'].read()
+            image_hash = image_digest(image_bytes)
+            if len(image_bytes) <= MAX_IMAGE_BYTES:
+                image = {'Bytes': image_bytes}
+            timer.mark('fetch')
 
         # Step 1: Detect faces
         response = rekognition.detect_faces(
-            Image={'S3Object': {'Bucket': bucket, 'Name': key}},
+            Image=image,
             Attributes=['ALL']
         )
+        timer.mark('detect')
 
         face_details = response.get('FaceDetails', [])
         
         # Handle case when no face is detected
         if not face_details:
             print("No face detected in image.")
+            dynamodb.Table(DYNAMO_TABLE).put_item(Item=face_results.build_status_item(
+                bucket, key, 'NO_FACE', context, uploaded_at=face_results.event_time(event), timer=timer
+            ))
+            item_written = True
             # Send notification even when no face is detected
-            message = f"""Image Processing Result
-
-Image: {key}
-Bucket: {bucket}
-Status: No face detected
-
-The uploaded image does not contain any detectable faces.
-Access should be denied."""
-            
+            subject, message = face_results.no_face_notification(bucket, key)
             sns.publish(
                 TopicArn=SNS_TOPIC_ARN,
                 Message=message,
-                Subject="🚫 Face Recognition Alert - No Face Detected"
+                Subject=subject
             )
             print("SNS notification sent for no face detected.")
-            return {'statusCode': 200, 'body': 'No face detected. Notification sent.'}
+            return face_results.no_face_response()
 
         # Face detected - process it
         face = face_details[0]
         print("Face detected. Processing...")
 
-        # Step 2: Search for face match in collection
-        match_response = rekognition.search_faces_by_image(
-            CollectionId=REKOGNITION_COLLECTION,
-            Image={'S3Object': {'Bucket': bucket, 'Name': key}},
-            MaxFaces=1,
-            FaceMatchThreshold=90
-        )
-
-        matches = match_response.get('FaceMatches', [])
-        is_matched = len(matches) > 0
-        match_info = matches[0]['Face']['ExternalImageId'] if is_matched else 'No match found'
-        match_confidence = matches[0]['Similarity'] if is_matched else 0
+        # Step 2: Search for face match in collection, unless this exact image
+        # was already matched against the current collection version
+        version, cached = None, None
+        if match_cache:
+            try:
+                version, cached = match_cache.lookup(image_hash)
+            except Exception as cache_error:
+                print(f"Match cache lookup failed: {str(cache_error)}")
+            timer.mark('cache')
+
+        if cached:
+            is_matched, match_info, match_confidence = cached
+        else:
+            match_response = rekognition.search_faces_by_image(
+                CollectionId=REKOGNITION_COLLECTION,
+                Image=image,
+                MaxFaces=1,
+                FaceMatchThreshold=90
+            )
+            is_matched, match_info, match_confidence = face_results.extract_match(match_response)
+            timer.mark('search')
+            if match_cache:
+                try:
+                    match_cache.store(image_hash, version, (is_matched, match_info, match_confidence))
+                except Exception as cache_error:
+                    print(f"Match cache store failed: {str(cache_error)}")
+
+        if match_cache:
+            print(f"Match cache {'hit' if cached else 'miss'}. Hit rate: {match_cache.hit_rate_summary()}")
         
         print(f"Match result: {match_info} (Matched: {is_matched})")
 
         # Step 3: Write to DynamoDB with match status
         table = dynamodb.Table(DYNAMO_TABLE)
-        table.put_item(Item={
-            'FaceId': key,
-            'ImageKey': key,
-            'Bucket': bucket,
-            'MatchStatus': 'MATCHED' if is_matched else 'UNMATCHED',
-            'MatchedEmployee': match_info if is_matched else 'N/A',
-            'MatchConfidence': Decimal(str(match_confidence)) if is_matched else Decimal('0'),
-            'AgeRange': {
-                'Low': Decimal(str(face['AgeRange']['Low'])),
-                'High': Decimal(str(face['AgeRange']['High']))
-            },
-            'Gender': {
-                'Value': face['Gender']['Value'],
-                'Confidence': Decimal(str(face['Gender']['Confidence']))
-            },
-            'Emotions': [
-                {
-                    'Type': e['Type'],
-                    'Confidence': Decimal(str(e['Confidence']))
-                } for e in face['Emotions']
-            ],
-            'ProcessedAt': context.aws_request_id if context else 'unknown'
-        })
+        item = face_results.build_face_item(
+            bucket, key, face, is_matched, match_info, match_confidence, context,
+            uploaded_at=face_results.event_time(event), timer=timer
+        )
+        table.put_item(Item=item)
+        item_written = True
         print("Data written to DynamoDB.")
 
         # Step 4: Publish to SNS with detailed information
-        if is_matched:
-            # Matched employee - authorized access
-            message = f"""✅ AUTHORIZED ACCESS - Employee Recognized
-
-Image: {key}
-Bucket: {bucket}
-Employee ID: {match_info}
-Match Confidence: {match_confidence:.2f}%
-Status: MATCHED
-
-Face Details:
-- Age Range: {face['AgeRange']['Low']}-{face['AgeRange']['High']} years
-- Gender: {face['Gender']['Value']} (Confidence: {face['Gender']['Confidence']:.2f}%)
-
-Action: Door should be UNLOCKED. Employee is authorized to enter."""
-            
-            subject = "✅ Face Recognition - Authorized Access"
-        else:
-            # Unmatched face - unauthorized access
-            message = f"""🚫 UNAUTHORIZED ACCESS - Unknown Person
-
-Image: {key}
-Bucket: {bucket}
-Status: UNMATCHED
-Match Result: No matching employee found in database
-
-Face Details:
-- Age Range: {face['AgeRange']['Low']}-{face['AgeRange']['High']} years
-- Gender: {face['Gender']['Value']} (Confidence: {face['Gender']['Confidence']:.2f}%)
-
-Action: Door should remain LOCKED. Unauthorized access attempt detected.
-Security should be notified immediately."""
-            
-            subject = "🚫 Face Recognition - Unauthorized Access Attempt"
+        subject, message = face_results.match_notification(
+            bucket, key, face, is_matched, match_info, match_confidence
+        )
+        # Capture the item and message allocations while they are still live
+        snapshot_point('item_built')
         
         sns.publish(
             TopicArn=SNS_TOPIC_ARN,
@@ -140,38 +151,32 @@ Security should be notified immediately."""
         )
         print(f"SNS notification sent. Status: {'MATCHED' if is_matched else 'UNMATCHED'}")
 
-        return {
-            'statusCode': 200,
-            'body': json.dumps({
-                'status': 'processed',
-                'matched': is_matched,
-                'employee': match_info,
-                'confidence': match_confidence if is_matched else 0
-            })
-        }
+        return face_results.processed_response(is_matched, match_info, match_confidence)
 
     except Exception as e:
         error_message = str(e)
         print(f"Error: {error_message}")
+
+        # Record the failed upload unless its result was already written
+        if timer and not item_written:
+            try:
+                dynamodb.Table(DYNAMO_TABLE).put_item(Item=face_results.build_status_item(
+                    bucket, key, 'ERROR', context, uploaded_at=face_results.event_time(event),
+                    timer=timer, error_message=error_message
+                ))
+            except Exception as dynamo_error:
+                print(f"Failed to record error in DynamoDB: {str(dynamo_error)}")
         
         # Send error notification via SNS
         try:
-            error_notification = f"""❌ ERROR - Face Recognition Processing Failed
-
-Image: {key}
-Bucket: {bucket}
-Error: {error_message}
-
-The face recognition pipeline encountered an error while processing the image.
-Please check the Lambda logs for more details."""
-            
+            subject, error_notification = face_results.error_notification(bucket, key, error_message)
             sns.publish(
                 TopicArn=SNS_TOPIC_ARN,
                 Message=error_notification,
-                Subject="❌ Face Recognition - Processing Error"
+                Subject=subject
             )
             print("Error notification sent via SNS.")
         except Exception as sns_error:
             print(f"Failed to send error notification: {str(sns_error)}")
         
-        return {'statusCode': 500, 'body': f'Error: {error_message}'}
\ No newline at end of file
+        return face_results.error_response(error_message)
\ No newline at end of file
@@ -0,0 +1,240 @@
+import asyncio
+import os
+import time
+from contextlib import AsyncExitStack
+
+from boto3.dynamodb.types import TypeSerializer
+
+import face_results
+import recognition_backend
+from profiling import profiled
+
+# asyncio variant of lambda_function.lambda_handler. Rekognition, DynamoDB and
+# SNS calls run as coroutines on one event loop that is kept alive between warm
+# invocations, so the aiobotocore clients (and their HTTP connection pools) are
+# only opened on a cold start. Requires aiobotocore, e.g. from a Lambda layer.
+# Deploy with LAMBDA_HANDLER=lambda_async.lambda_handler.
+#
+# Unlike the sync handler, search_faces_by_image is always started alongside
+# detect_faces, so every no-face upload costs one extra (failing) Rekognition
+# request in exchange for lower latency on images with a face.
+
+REGION = 'us-east-2'
+DYNAMO_TABLE = os.environ.get('DYNAMO_TABLE', 'FaceMetadata')
+SNS_TOPIC_ARN = os.environ.get('SNS_TOPIC_ARN', 'arn:aws:sns:us-east-2:094092120892:FaceDetectedTopic')
+REKOGNITION_COLLECTION = os.environ.get('REKOGNITION_COLLECTION', 'employeeFaces')
+MAX_POOL_CONNECTIONS = int(os.environ.get('MAX_POOL_CONNECTIONS', '10'))
+
+_serializer = TypeSerializer()
+_loop = None
+_exit_stack = None
+_clients = None
+
+
+def get_loop():
+    """Return the event loop shared by all invocations in this container"""
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_loop)
+    return _loop
+
+
+async def get_clients():
+    """Open the async AWS clients once and reuse them across invocations"""
+    global _exit_stack, _clients
+    if _clients is None:
+        from aiobotocore.config import AioConfig
+        from aiobotocore.session import get_session
+
+        session = get_session()
+        config = AioConfig(max_pool_connections=MAX_POOL_CONNECTIONS)
+        stack = AsyncExitStack()
+        clients = {}
+        try:
+            services = ['dynamodb', 'sns']
+            if recognition_backend.RECOGNITION_BACKEND == 'rekognition':
+                services.append('rekognition')
+            else:
+                clients['rekognition'] = recognition_backend.AsyncBackend(recognition_backend.from_environment())
+            for service in services:
+                clients[service] = await stack.enter_async_context(
+                    session.create_client(service, region_name=REGION, config=config)
+                )
+        except BaseException:
+            # Close whichever clients were opened before the failure
+            await stack.aclose()
+            raise
+        _exit_stack, _clients = stack, clients
+    return _clients
+
+
+def set_clients(clients):
+    """Use the given {'rekognition', 'dynamodb', 'sns'} clients (e.g. stubs)"""
+    global _clients
+    _clients = clients
+
+
+async def close_clients():
+    global _exit_stack, _clients
+    if _exit_stack is not None:
+        await _exit_stack.aclose()
+    _exit_stack, _clients = None, None
+
+
+def serialize_item(item):
+    """Convert a FaceMetadata item to the low-level DynamoDB attribute format"""
+    return {k: _serializer.serialize(v) for k, v in item.items()}
+
+
+async def publish_error(sns, bucket, key, error_message):
+    """Send the error notification, via boto3 if the async clients never opened"""
+    subject, message = face_results.error_notification(bucket, key, error_message)
+    if sns is None:
+        import boto3
+        boto3.client('sns', region_name=REGION).publish(TopicArn=SNS_TOPIC_ARN, Message=message, Subject=subject)
+    else:
+        await sns.publish(TopicArn=SNS_TOPIC_ARN, Message=message, Subject=subject)
+
+
+async def put_item(dynamodb, item):
+    """Write a FaceMetadata item, via boto3 if the async clients never opened"""
+    if dynamodb is None:
+        import boto3
+        boto3.client('dynamodb', region_name=REGION).put_item(TableName=DYNAMO_TABLE, Item=serialize_item(item))
+    else:
+        await dynamodb.put_item(TableName=DYNAMO_TABLE, Item=serialize_item(item))
+
+
+async def _timed(call):
+    start = time.perf_counter()
+    try:
+        await call
+    except Exception as e:
+        print(f"Warm-up call failed: {str(e)}")
+    return round((time.perf_counter() - start) * 1000, 1)
+
+
+async def warm_up():
+    """Open a connection to each service without processing an image"""
+    try:
+        clients = await get_clients()
+    except Exception as e:
+        print(f"Warm-up failed to open clients: {str(e)}")
+        return face_results.error_response(str(e))
+    timings = await asyncio.gather(
+        _timed(clients['rekognition'].describe_collection(CollectionId=REKOGNITION_COLLECTION)),
+        _timed(clients['dynamodb'].describe_table(TableName=DYNAMO_TABLE)),
+        _timed(clients['sns'].get_topic_attributes(TopicArn=SNS_TOPIC_ARN))
+    )
+    timings = dict(zip(('rekognition', 'dynamodb', 'sns'), timings))
+    print(f"Warm-up complete: {timings}")
+    return face_results.warmup_response(timings)
+
+
+async def handle_event(event, context):
+    # Keep-alive events only warm the container
+    if face_results.is_warmup_event(event):
+        return await warm_up()
+
+    # Extract bucket and key early for error handling
+    bucket = 'Unknown'
+    key = 'Unknown'
+    sns = None
+    dynamodb = None
+    timer = None
+    item_written = False
+    try:
+        bucket, key = face_results.parse_s3_record(event)
+        print(f"Processing image: {key} from bucket: {bucket}")
+        timer = face_results.StageTimer()
+        clients = await get_clients()
+        rekognition = clients['rekognition']
+        dynamodb = clients['dynamodb']
+        sns = clients['sns']
+
+        # Steps 1 and 2 run concurrently. search_faces_by_image fails on images
+        # without a face, so its result is only inspected once a face is found.
+        image = face_results.s3_image(bucket, key)
+        response, match_response = await asyncio.gather(
+            rekognition.detect_faces(Image=image, Attributes=['ALL']),
+            rekognition.search_faces_by_image(
+                CollectionId=REKOGNITION_COLLECTION,
+                Image=image,
+                MaxFaces=1,
+                FaceMatchThreshold=90
+            ),
+            return_exceptions=True
+        )
+        timer.mark('recognize')
+        if isinstance(response, Exception):
+            raise response
+
+        face_details = response.get('FaceDetails', [])
+
+        # Handle case when no face is detected
+        if not face_details:
+            print("No face detected in image.")
+            item = face_results.build_status_item(
+                bucket, key, 'NO_FACE', context, uploaded_at=face_results.event_time(event), timer=timer
+            )
+            await put_item(dynamodb, item)
+            item_written = True
+            subject, message = face_results.no_face_notification(bucket, key)
+            await sns.publish(TopicArn=SNS_TOPIC_ARN, Message=message, Subject=subject)
+            print("SNS notification sent for no face detected.")
+            return face_results.no_face_response()
+
+        if isinstance(match_response, Exception):
+            raise match_response
+
+        face = face_details[0]
+        is_matched, match_info, match_confidence = face_results.extract_match(match_response)
+        print(f"Match result: {match_info} (Matched: {is_matched})")
+
+        # Step 3: Write to DynamoDB before notifying, as the sync handler does
+        item = face_results.build_face_item(
+            bucket, key, face, is_matched, match_info, match_confidence, context,
+            uploaded_at=face_results.event_time(event), timer=timer
+        )
+        await put_item(dynamodb, item)
+        item_written = True
+        print("Data written to DynamoDB.")
+
+        # Step 4: Publish to SNS
+        subject, message = face_results.match_notification(
+            bucket, key, face, is_matched, match_info, match_confidence
+        )
+        await sns.publish(TopicArn=SNS_TOPIC_ARN, Message=message, Subject=subject)
+        print(f"SNS notification sent. Status: {'MATCHED' if is_matched else 'UNMATCHED'}")
+
+        return face_results.processed_response(is_matched, match_info, match_confidence)
+
+    except Exception as e:
+        error_message = str(e)
+        print(f"Error: {error_message}")
+
+        # Record the failed upload unless its result was already written
+        if timer and not item_written:
+            try:
+                item = face_results.build_status_item(
+                    bucket, key, 'ERROR', context, uploaded_at=face_results.event_time(event),
+                    timer=timer, error_message=error_message
+                )
+                await put_item(dynamodb, item)
+            except Exception as dynamo_error:
+                print(f"Failed to record error in DynamoDB: {str(dynamo_error)}")
+
+        # Send error notification via SNS
+        try:
+            await publish_error(sns, bucket, key, error_message)
+            print("Error notification sent via SNS.")
+        except Exception as sns_error:
+            print(f"Failed to send error notification: {str(sns_error)}")
+
+        return face_results.error_response(error_message)
+
+
+@profiled
+def lambda_handler(event, context):
+    return get_loop().run_until_complete(handle_event(event, context))
@@ -0,0 +1,201 @@
+import hashlib
+import io
+import os
+import uuid
+
+import numpy as np
+from botocore.exceptions import ClientError
+
+from recognition_backend import RecognitionBackend
+
+# CPU face matcher for offline and load testing. Enrolled faces are rows of a
+# unit-normalised float32 matrix, so one search is a single matrix-vector
+# product over the whole collection, which stays fast at 100k+ faces.
+#
+# Images become embeddings through an embedder callable. The default accepts:
+#   .npy payloads   the stored vector is the embedding (e.g. precomputed by a
+#                   real face model); an all-zero vector means "no face" and
+#                   any size other than the collection's dim is rejected
+#   anything else   a deterministic vector seeded from the SHA-256 of the bytes,
+#                   so byte-identical images match and different ones do not
+#   empty bytes     no face
+# S3Object images are read from LOCAL_IMAGE_DIR/<bucket>/<key>.
+
+LOCAL_FACES_PATH = os.environ.get('LOCAL_FACES_PATH', 'local_faces.npz')
+LOCAL_IMAGE_DIR = os.environ.get('LOCAL_IMAGE_DIR', '.')
+LOCAL_EMBEDDING_DIM = int(os.environ.get('LOCAL_EMBEDDING_DIM', '128'))
+
+NPY_MAGIC = b'\x93NUMPY'
+BOUNDING_BOX = {'Width': 1.0, 'Height': 1.0, 'Left': 0.0, 'Top': 0.0}
+
+
+def hash_embedding(image_bytes, dim):
+    seed = int.from_bytes(hashlib.sha256(image_bytes).digest()[:8], 'big')
+    return np.random.default_rng(seed).standard_normal(dim).astype(np.float32)
+
+
+def client_error(code, message, operation):
+    """A ClientError shaped like Rekognition's, so callers handle one error type"""
+    return ClientError({'Error': {'Code': code, 'Message': message}}, operation)
+
+
+def default_embedder(image_bytes, dim=LOCAL_EMBEDDING_DIM):
+    """Return the embedding for an image, or None when it has no face"""
+    if not image_bytes:
+        return None
+    if image_bytes.startswith(NPY_MAGIC):
+        vector = np.load(io.BytesIO(image_bytes)).astype(np.float32).ravel()
+        return vector if np.any(vector) else None
+    return hash_embedding(image_bytes, dim)
+
+
+class LocalBackend(RecognitionBackend):
+    def __init__(self, dim=LOCAL_EMBEDDING_DIM, embedder=None, image_dir=LOCAL_IMAGE_DIR):
+        self.dim = dim
+        # The default embedder reads self.dim per call, since load() can change it
+        self.embedder = embedder or self.default_embed
+        self.image_dir = image_dir
+        self.embeddings = np.zeros((0, dim), dtype=np.float32)
+        self.count = 0
+        self.face_ids = []
+        self.external_ids = []
+
+    @classmethod
+    def from_environment(cls):
+        backend = cls()
+        if os.path.exists(LOCAL_FACES_PATH):
+            backend.load(LOCAL_FACES_PATH)
+        return backend
+
+    def load(self, path):
+        data = np.load(path)
+        self.embeddings = data['embeddings'].astype(np.float32)
+        self.count = len(self.embeddings)
+        self.dim = self.embeddings.shape[1]
+        self.face_ids = [str(face_id) for face_id in data['face_ids']]
+        self.external_ids = [str(external_id) for external_id in data['external_ids']]
+
+    def save(self, path=LOCAL_FACES_PATH):
+        np.savez(
+            path,
+            embeddings=self.embeddings[:self.count],
+            face_ids=np.array(self.face_ids),
+            external_ids=np.array(self.external_ids)
+        )
+
+    def default_embed(self, image_bytes):
+        return default_embedder(image_bytes, self.dim)
+
+    def image_bytes(self, image):
+        if 'Bytes' in image:
+            return image['Bytes']
+        s3_object = image['S3Object']
+        with open(os.path.join(self.image_dir, s3_object['Bucket'], s3_object['Name']), 'rb') as f:
+            return f.read()
+
+    def embed(self, image, operation):
+        """Return the unit-normalised embedding of an image, or None"""
+        vector = self.embedder(self.image_bytes(image))
+        if vector is None:
+            return None
+        if vector.size != self.dim:
+            raise client_error(
+                'InvalidImageFormatException',
+                f"Embedding has {vector.size} values but the collection uses {self.dim}.",
+                operation
+            )
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def add_embeddings(self, vectors, external_ids):
+        """Enroll pre-computed embeddings (one row each); returns their FaceIds"""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1, norms)
+
+        needed = self.count + len(vectors)
+        if needed > len(self.embeddings):
+            # Grow geometrically so enrolling n faces costs O(n) copies overall
+            grown = np.zeros((max(needed, 2 * len(self.embeddings), 16), self.dim), dtype=np.float32)
+            grown[:self.count] = self.embeddings[:self.count]
+            self.embeddings = grown
+        self.embeddings[self.count:needed] = vectors
+        self.count = needed
+
+        face_ids = [str(uuid.uuid4()) for _ in range(len(vectors))]
+        self.face_ids.extend(face_ids)
+        self.external_ids.extend(external_ids)
+        return face_ids
+
+    def face(self, index):
+        return {
+            'FaceId': self.face_ids[index],
+            'ExternalImageId': self.external_ids[index],
+            'BoundingBox': BOUNDING_BOX,
+            'Confidence': 100.0
+        }
+
+    def detect_faces(self, Image, Attributes=None):
+        if self.embed(Image, 'DetectFaces') is None:
+            return {'FaceDetails': []}
+        # No attribute model: report neutral values in Rekognition's shape
+        return {'FaceDetails': [{
+            'BoundingBox': BOUNDING_BOX,
+            'AgeRange': {'Low': 0, 'High': 0},
+            'Gender': {'Value': 'Unknown', 'Confidence': 0.0},
+            'Emotions': [],
+            'Confidence': 100.0
+        }]}
+
+    def search_faces_by_image(self, CollectionId, Image, MaxFaces=1, FaceMatchThreshold=80):
+        query = self.embed(Image, 'SearchFacesByImage')
+        if query is None:
+            # Rekognition rejects searches on images without a face
+            raise client_error(
+                'InvalidParameterException',
+                "There are no faces in the image. Should be at least 1.",
+                'SearchFacesByImage'
+            )
+
+        matches = []
+        if self.count:
+            similarity = np.clip(self.embeddings[:self.count] @ query, 0, 1) * 100
+            candidates = np.flatnonzero(similarity >= FaceMatchThreshold)
+            if len(candidates) > MaxFaces:
+                candidates = candidates[np.argpartition(similarity[candidates], -MaxFaces)[-MaxFaces:]]
+            candidates = candidates[np.argsort(similarity[candidates])[::-1]]
+            matches = [{'Similarity': float(similarity[i]), 'Face': self.face(i)} for i in candidates]
+
+        return {
+            'SearchedFaceBoundingBox': BOUNDING_BOX,
+            'SearchedFaceConfidence': 100.0,
+            'FaceMatches': matches,
+            'FaceModelVersion': 'local'
+        }
+
+    def index_faces(self, CollectionId, Image, ExternalImageId=None, **kwargs):
+        vector = self.embed(Image, 'IndexFaces')
+        if vector is None:
+            return {'FaceRecords': [], 'UnindexedFaces': [], 'FaceModelVersion': 'local'}
+        self.add_embeddings(vector, [ExternalImageId or ''])
+        return {
+            'FaceRecords': [{'Face': self.face(self.count - 1)}],
+            'UnindexedFaces': [],
+            'FaceModelVersion': 'local'
+        }
+
+    def list_faces(self, CollectionId, **kwargs):
+        return {'Faces': [self.face(i) for i in range(self.count)], 'FaceModelVersion': 'local'}
+
+    def delete_faces(self, CollectionId, FaceIds):
+        doomed = set(FaceIds)
+        keep = [i for i, face_id in enumerate(self.face_ids) if face_id not in doomed]
+        deleted = [face_id for face_id in self.face_ids if face_id in doomed]
+        self.embeddings = self.embeddings[keep]
+        self.count = len(keep)
+        self.face_ids = [self.face_ids[i] for i in keep]
+        self.external_ids = [self.external_ids[i] for i in keep]
+        return {'DeletedFaces': deleted}
+
+    def describe_collection(self, CollectionId):
+        return {'FaceCount': self.count, 'FaceModelVersion': 'local'}
@@ -0,0 +1,93 @@
+import argparse
+
+import boto3
+
+import recognition_backend
+from match_cache import MATCH_CACHE_TABLE, bump_collection_version
+
+# Amazon Rekognition, or the local matcher when RECOGNITION_BACKEND=local
+rekognition = recognition_backend.from_environment()
+dynamodb = boto3.resource('dynamodb', region_name='us-east-2')
+collection_id = 'employeeFaces'
+bucket_name = 'rekognition-upload-bucket1'
+
+# Enrollment changes the answer for images already in the match cache, so
+# every successful index or delete increments the collection version.
+
+def invalidate_match_cache():
+    """Bump the collection version so cached match results are no longer served"""
+    try:
+        version = bump_collection_version(dynamodb.Table(MATCH_CACHE_TABLE), collection_id)
+        print(f"Collection version is now {version}; cached match results invalidated.")
+        return True
+    except Exception as e:
+        print(f"Error bumping collection version in '{MATCH_CACHE_TABLE}': {e}")
+        return False
+
+def save_local_faces():
+    """Persist the local matcher's faces; Rekognition stores them itself"""
+    if recognition_backend.RECOGNITION_BACKEND == 'local':
+        rekognition.save()
+
+def index_face(key, employee_id):
+    """Add the face in an S3 image to the collection under an employee ID"""
+    try:
+        response = rekognition.index_faces(
+            CollectionId=collection_id,
+            Image={'S3Object': {'Bucket': bucket_name, 'Name': key}},
+            ExternalImageId=employee_id,
+            MaxFaces=1,
+            QualityFilter='AUTO',
+            DetectionAttributes=[]
+        )
+    except Exception as e:
+        print(f"Error indexing face from '{key}': {e}")
+        return False
+
+    records = response.get('FaceRecords', [])
+    if not records:
+        print(f"No face indexed from '{key}'. Unindexed faces: {len(response.get('UnindexedFaces', []))}")
+        return False
+    print(f"Indexed face {records[0]['Face']['FaceId']} for employee '{employee_id}'.")
+    save_local_faces()
+    return invalidate_match_cache()
+
+def delete_faces(face_ids):
+    """Remove faces from the collection by FaceId"""
+    try:
+        deleted = rekognition.delete_faces(CollectionId=collection_id, FaceIds=face_ids)['DeletedFaces']
+    except Exception as e:
+        print(f"Error deleting faces: {e}")
+        return False
+    print(f"Deleted {len(deleted)} face(s) from '{collection_id}'.")
+    save_local_faces()
+    return invalidate_match_cache() if deleted else True
+
+def list_faces():
+    """Print every FaceId and employee ID in the collection"""
+    kwargs = {}
+    while True:
+        page = rekognition.list_faces(CollectionId=collection_id, **kwargs)
+        for face in page['Faces']:
+            print(f"{face['FaceId']}  {face.get('ExternalImageId', '')}")
+        if not page.get('NextToken'):
+            return True
+        kwargs['NextToken'] = page['NextToken']
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=f"Manage faces in the '{collection_id}' collection")
+    commands = parser.add_subparsers(dest='command', required=True)
+    index_parser = commands.add_parser('index', help="Index the face in an S3 image")
+    index_parser.add_argument('key')
+    index_parser.add_argument('employee_id')
+    delete_parser = commands.add_parser('delete', help="Delete faces by FaceId")
+    delete_parser.add_argument('face_ids', nargs='+')
+    commands.add_parser('list', help="List enrolled faces")
+    args = parser.parse_args()
+
+    if args.command == 'index':
+        index_face(args.key, args.employee_id)
+    elif args.command == 'delete':
+        delete_faces(args.face_ids)
+    else:
+        list_faces()
@@ -0,0 +1,131 @@
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from decimal import Decimal
+
+# Caches search_faces_by_image results by the SHA-256 of the image bytes, so
+# re-sent identical images skip the Rekognition round trip. Tiers:
+#   memory    LRU of MATCH_CACHE_SIZE entries, private to a warm container
+#   dynamodb  entries in MATCH_CACHE_TABLE, expired by DynamoDB TTL
+# Every entry is tagged with the collection version, a counter in
+# MATCH_CACHE_TABLE that manage_faces.py increments after indexing or deleting
+# faces. Entries from an older version are never served, so an UNMATCHED
+# result cannot outlive a new employee's enrollment.
+
+MATCH_CACHE = os.environ.get('MATCH_CACHE', '')  # '', 'memory' or 'dynamodb'
+MATCH_CACHE_TABLE = os.environ.get('MATCH_CACHE_TABLE', 'FaceMatchCache')
+MATCH_CACHE_SIZE = int(os.environ.get('MATCH_CACHE_SIZE', '256'))
+MATCH_CACHE_TTL_SECONDS = int(os.environ.get('MATCH_CACHE_TTL_SECONDS', '86400'))
+
+
+def image_digest(image_bytes):
+    return hashlib.sha256(image_bytes).hexdigest()
+
+
+def version_key(collection_id):
+    return f'collection-version#{collection_id}'
+
+
+def bump_collection_version(table, collection_id):
+    """Increment and return the collection version; call after faces change"""
+    response = table.update_item(
+        Key={'CacheKey': version_key(collection_id)},
+        UpdateExpression='ADD Version :one',
+        ExpressionAttributeValues={':one': 1},
+        ReturnValues='UPDATED_NEW'
+    )
+    return int(response['Attributes']['Version'])
+
+
+class MatchCache:
+    def __init__(self, dynamodb, collection_id, table_name=MATCH_CACHE_TABLE,
+                 size=MATCH_CACHE_SIZE, ttl_seconds=MATCH_CACHE_TTL_SECONDS, use_dynamodb=False):
+        self.dynamodb = dynamodb
+        self.table = dynamodb.Table(table_name)
+        self.table_name = table_name
+        self.collection_id = collection_id
+        self.size = size
+        self.ttl_seconds = ttl_seconds
+        self.use_dynamodb = use_dynamodb
+        self.entries = OrderedDict()
+        self.hits = {'memory': 0, 'dynamodb': 0}
+        self.lookups = 0
+
+    @classmethod
+    def from_environment(cls, dynamodb, collection_id):
+        """Return the cache configured by MATCH_CACHE, or None when disabled"""
+        if MATCH_CACHE not in ('memory', 'dynamodb'):
+            return None
+        return cls(dynamodb, collection_id, use_dynamodb=MATCH_CACHE == 'dynamodb')
+
+    def entry_key(self, image_hash):
+        return f'match#{self.collection_id}#{image_hash}'
+
+    def lookup(self, image_hash):
+        """Return (collection_version, cached result or None)
+
+        The version is read before Rekognition is searched, so a result stored
+        under it predates any enrollment that bumps it. The version is None
+        when it could not be read.
+        """
+        self.lookups += 1
+        version_item_key = {'CacheKey': version_key(self.collection_id)}
+        entry_item_key = {'CacheKey': self.entry_key(image_hash)}
+
+        if self.use_dynamodb:
+            # One round trip for the version and the stored entry
+            response = self.dynamodb.batch_get_item(RequestItems={
+                self.table_name: {'Keys': [version_item_key, entry_item_key], 'ConsistentRead': True}
+            })
+            if response.get('UnprocessedKeys'):
+                return None, None  # Version unknown: neither serve nor store
+            items = {item['CacheKey']: item for item in response['Responses'].get(self.table_name, [])}
+            version = int(items.get(version_item_key['CacheKey'], {}).get('Version', 0))
+            stored = items.get(entry_item_key['CacheKey'])
+        else:
+            item = self.table.get_item(Key=version_item_key, ConsistentRead=True).get('Item', {})
+            version = int(item.get('Version', 0))
+            stored = None
+
+        cached = self.entries.get(image_hash)
+        if cached and cached[0] == version:
+            self.entries.move_to_end(image_hash)
+            self.hits['memory'] += 1
+            return version, cached[1]
+
+        if stored and int(stored['CollectionVersion']) == version and stored['ExpiresAt'] > time.time():
+            result = (stored['Matched'], stored['Employee'], float(stored['Similarity']) if stored['Matched'] else 0)
+            self.remember(image_hash, version, result)
+            self.hits['dynamodb'] += 1
+            return version, result
+
+        return version, None
+
+    def remember(self, image_hash, version, result):
+        self.entries[image_hash] = (version, result)
+        self.entries.move_to_end(image_hash)
+        while len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+    def store(self, image_hash, version, result):
+        """Cache an (is_matched, match_info, match_confidence) result"""
+        if version is None:
+            return
+        self.remember(image_hash, version, result)
+        if self.use_dynamodb:
+            is_matched, match_info, match_confidence = result
+            self.table.put_item(Item={
+                'CacheKey': self.entry_key(image_hash),
+                'CollectionVersion': version,
+                'Matched': is_matched,
+                'Employee': match_info,
+                'Similarity': Decimal(str(match_confidence)),
+                'ExpiresAt': int(time.time()) + self.ttl_seconds
+            })
+
+    def hit_rate_summary(self):
+        hits = self.hits['memory'] + self.hits['dynamodb']
+        rate = hits / self.lookups * 100 if self.lookups else 0.0
+        return (f"{hits}/{self.lookups} ({rate:.1f}%), "
+                f"memory {self.hits['memory']}, dynamodb {self.hits['dynamodb']}")
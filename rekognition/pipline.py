@@ -20,8 +20,9 @@ def run_pipeline():
     create_rekognition_collection.create_collection()
     
     # Step 3: Create DynamoDB table
-    print("\n[3/7] Creating DynamoDB table...")
+    print("\n[3/7] Creating DynamoDB tables...")
     create_dynamodb.create_table()
+    create_dynamodb.create_cache_table()
     
     # Step 4: Create SNS topic
     print("\n[4/7] Creating SNS topic...")
@@ -31,9 +32,10 @@ def run_pipeline():
     print("\n[5/7] Creating IAM role for Lambda function...")
     create_iam_role.create_lambda_role()
     
-    # Step 6: Deploy Lambda function
-    print("\n[6/7] Deploying Lambda function...")
+    # Step 6: Deploy Lambda functions
+    print("\n[6/7] Deploying Lambda functions...")
     deploy_lambda.deploy_lambda()
+    deploy_lambda.deploy_stream_consumer()
     
     # Step 7: Configure S3 event notification
     print("\n[7/7] Configuring S3 event notification...")
@@ -43,7 +45,7 @@ def run_pipeline():
     print("Pipeline setup complete!")
     print("=" * 50)
     print("\nNext steps:")
-    print("1. Upload employee face images to the Rekognition collection")
+    print("1. Enroll employee faces with: python manage_faces.py index <s3-key> <employee-id>")
     print("2. Subscribe to the SNS topic to receive notifications")
     print("3. Test by uploading an image to the S3 bucket")
 
@@ -0,0 +1,160 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import random
+import time
+import tracemalloc
+from functools import wraps
+
+from s3_uri import parse_s3_uri
+
+# Opt-in profiling for the Lambda handlers, configured through environment
+# variables set during deployment:
+#   PROFILE_SAMPLE_RATE  fraction of invocations to profile (0 disables, 1 = all)
+#   PROFILE_TOP_N        number of functions / allocation sites in the log summary
+#   PROFILE_S3_URI       optional s3://bucket/prefix to upload full .prof files to
+# With PROFILE_SAMPLE_RATE unset or 0 the handler is returned unwrapped.
+
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', '0'))
+PROFILE_TOP_N = int(os.environ.get('PROFILE_TOP_N', '10'))
+PROFILE_S3_URI = os.environ.get('PROFILE_S3_URI', '')
+
+_s3 = None
+
+
+def top_functions(profiler, limit):
+    """Return the functions with the most self time as compact dicts"""
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    rows = sorted(stats.stats.items(), key=lambda row: row[1][2], reverse=True)
+    return [
+        {
+            'function': f"{os.path.basename(filename)}:{line}({name})",
+            'calls': ncalls,
+            'self_ms': round(tottime * 1000, 3),
+            'cum_ms': round(cumtime * 1000, 3)
+        }
+        for (filename, line, name), (_, ncalls, tottime, cumtime, _) in rows[:limit]
+    ]
+
+
+def allocation_growth(snapshot, baseline, limit):
+    """Return the source lines that allocated the most since the baseline snapshot"""
+    filters = [
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__)
+    ]
+    stats = snapshot.filter_traces(filters).compare_to(baseline.filter_traces(filters), 'lineno')
+    return [
+        {
+            'line': f"{os.path.basename(stat.traceback[0].filename)}:{stat.traceback[0].lineno}",
+            'kib': round(stat.size_diff / 1024, 1),
+            'count': stat.count_diff
+        }
+        for stat in stats[:limit] if stat.size_diff > 0
+    ]
+
+
+# Snapshots of the invocation currently being profiled, or None
+_active = None
+
+
+def snapshot_point(label):
+    """Record live allocations at this point of a profiled invocation
+
+    tracemalloc only sees memory that is still allocated, so short-lived
+    values (Decimal conversions, notification text) have to be captured while
+    they exist. Costs one global lookup when the invocation is not sampled.
+    """
+    if _active is not None:
+        _active['points'].append((label, tracemalloc.take_snapshot()))
+
+
+def upload_profile(profiler, request_id, event):
+    """Dump the full profile and upload it under PROFILE_S3_URI"""
+    global _s3
+    bucket, prefix = parse_s3_uri(PROFILE_S3_URI)
+    # Never write into a bucket that triggers this function
+    for record in event.get('Records', []) if isinstance(event, dict) else []:
+        if record.get('s3', {}).get('bucket', {}).get('name') == bucket:
+            print(f"Profile upload skipped: {bucket} is the triggering bucket.")
+            return None
+
+    path = f"/tmp/{request_id}.prof"
+    profiler.dump_stats(path)
+    if _s3 is None:
+        import boto3
+        _s3 = boto3.client('s3', region_name='us-east-2')
+    key = f"{prefix}/{request_id}.prof" if prefix else f"{request_id}.prof"
+    try:
+        _s3.upload_file(path, bucket, key)
+    finally:
+        os.remove(path)
+    return f"s3://{bucket}/{key}"
+
+
+def summarize(profiler, request_id, wall_ms, peak, points, baseline, event):
+    """Build the compact summary logged for a sampled invocation"""
+    summary = {
+        'request_id': request_id,
+        'wall_ms': round(wall_ms, 1),
+        'peak_kib': round(peak / 1024, 1) if peak is not None else None,
+        'top_functions': top_functions(profiler, PROFILE_TOP_N),
+        # Growth over the entry snapshot at each snapshot_point() and at return;
+        # memory allocated and freed between two points is not visible
+        'allocations': {
+            label: allocation_growth(snapshot, baseline, PROFILE_TOP_N)
+            for label, snapshot in points
+        }
+    }
+    if PROFILE_S3_URI:
+        try:
+            summary['profile_uri'] = upload_profile(profiler, request_id, event)
+        except Exception as e:
+            print(f"Failed to upload profile: {str(e)}")
+    return summary
+
+
+def profiled(handler):
+    """Wrap a Lambda handler so sampled invocations log a profile summary"""
+    if PROFILE_SAMPLE_RATE <= 0:
+        return handler
+
+    @wraps(handler)
+    def wrapper(event, context):
+        global _active
+        if random.random() >= PROFILE_SAMPLE_RATE:
+            return handler(event, context)
+
+        request_id = context.aws_request_id if context else 'local'
+        profiler = cProfile.Profile()
+        # Leave an outer trace (e.g. bench_async.measure) running and its peak untouched
+        owns_trace = not tracemalloc.is_tracing()
+        if owns_trace:
+            tracemalloc.start()
+        _active = {'baseline': tracemalloc.take_snapshot(), 'points': []}
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            result = handler(event, context)
+        finally:
+            profiler.disable()
+            wall_ms = (time.perf_counter() - start) * 1000
+            active, _active = _active, None
+            try:
+                peak = tracemalloc.get_traced_memory()[1] if owns_trace else None
+                points = active['points'] + [('return', tracemalloc.take_snapshot())]
+                if owns_trace:
+                    tracemalloc.stop()
+                summary = summarize(profiler, request_id, wall_ms, peak, points, active['baseline'], event)
+                print(f"PROFILE {json.dumps(summary, separators=(',', ':'))}")
+            except Exception as e:
+                # Profiling must never turn a processed image into a failed invocation
+                print(f"Failed to summarize profile: {str(e)}")
+            finally:
+                if owns_trace and tracemalloc.is_tracing():
+                    tracemalloc.stop()
+        return result
+
+    return wrapper
@@ -0,0 +1,99 @@
+import os
+from abc import ABC, abstractmethod
+
+# Face recognition backends used by the handlers and manage_faces.py. Every
+# backend takes the same keyword arguments and returns the same response
+# shapes as the boto3 Rekognition client, so callers do not care which one
+# they have. Selected with RECOGNITION_BACKEND:
+#   rekognition  Amazon Rekognition (default)
+#   local        NumPy cosine-similarity matcher for offline and load testing,
+#                see local_backend.py (needs numpy)
+
+RECOGNITION_BACKEND = os.environ.get('RECOGNITION_BACKEND', 'rekognition')
+
+
+class RecognitionBackend(ABC):
+    """Detect, search, index, list and delete faces in one collection"""
+
+    @abstractmethod
+    def detect_faces(self, Image, Attributes=None):
+        raise NotImplementedError
+
+    @abstractmethod
+    def search_faces_by_image(self, CollectionId, Image, MaxFaces=1, FaceMatchThreshold=80):
+        raise NotImplementedError
+
+    @abstractmethod
+    def index_faces(self, CollectionId, Image, ExternalImageId=None, **kwargs):
+        raise NotImplementedError
+
+    @abstractmethod
+    def list_faces(self, CollectionId, **kwargs):
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete_faces(self, CollectionId, FaceIds):
+        raise NotImplementedError
+
+    @abstractmethod
+    def describe_collection(self, CollectionId):
+        raise NotImplementedError
+
+
+class RekognitionBackend(RecognitionBackend):
+    """Amazon Rekognition, passing calls straight through to the boto3 client"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def detect_faces(self, Image, Attributes=None):
+        return self.client.detect_faces(Image=Image, Attributes=Attributes or ['DEFAULT'])
+
+    def search_faces_by_image(self, CollectionId, Image, MaxFaces=1, FaceMatchThreshold=80):
+        return self.client.search_faces_by_image(
+            CollectionId=CollectionId,
+            Image=Image,
+            MaxFaces=MaxFaces,
+            FaceMatchThreshold=FaceMatchThreshold
+        )
+
+    def index_faces(self, CollectionId, Image, ExternalImageId=None, **kwargs):
+        if ExternalImageId is not None:
+            kwargs['ExternalImageId'] = ExternalImageId
+        return self.client.index_faces(CollectionId=CollectionId, Image=Image, **kwargs)
+
+    def list_faces(self, CollectionId, **kwargs):
+        return self.client.list_faces(CollectionId=CollectionId, **kwargs)
+
+    def delete_faces(self, CollectionId, FaceIds):
+        return self.client.delete_faces(CollectionId=CollectionId, FaceIds=FaceIds)
+
+    def describe_collection(self, CollectionId):
+        return self.client.describe_collection(CollectionId=CollectionId)
+
+
+class AsyncBackend:
+    """Coroutine wrapper so lambda_async.py can await a synchronous backend"""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def __getattr__(self, name):
+        method = getattr(self.backend, name)
+
+        async def call(**kwargs):
+            return method(**kwargs)
+
+        return call
+
+
+def from_environment(region_name='us-east-2'):
+    """Return the backend selected by RECOGNITION_BACKEND"""
+    if RECOGNITION_BACKEND == 'local':
+        from local_backend import LocalBackend
+        return LocalBackend.from_environment()
+    if RECOGNITION_BACKEND != 'rekognition':
+        raise ValueError(f"Unknown RECOGNITION_BACKEND '{RECOGNITION_BACKEND}' (expected 'rekognition' or 'local')")
+
+    import boto3
+    return RekognitionBackend(boto3.client('rekognition', region_name=region_name))
@@ -0,0 +1,10 @@
+# Parsing for the optional s3://bucket/prefix settings (PROFILE_S3_URI,
+# SUMMARY_S3_URI), shared by profiling.py and throughput_stream.py.
+
+
+def parse_s3_uri(uri):
+    """Split s3://bucket/prefix into (bucket, prefix)"""
+    if not uri.startswith('s3://'):
+        raise ValueError(f"Expected an s3:// URI, got: {uri}")
+    bucket, _, prefix = uri[len('s3://'):].partition('/')
+    return bucket, prefix.strip('/')
@@ -0,0 +1,44 @@
+import io
+
+import pytest
+
+np = pytest.importorskip('numpy')
+ClientError = pytest.importorskip('botocore.exceptions').ClientError
+
+from local_backend import LocalBackend  # noqa: E402
+
+
+def npy(vector):
+    buffer = io.BytesIO()
+    np.save(buffer, np.asarray(vector, dtype=np.float32))
+    return {'Bytes': buffer.getvalue()}
+
+
+def test_default_embedder_follows_loaded_dim(tmp_path):
+    saved = LocalBackend(dim=8)
+    saved.add_embeddings(np.eye(8, dtype=np.float32)[:2], ['emp-0', 'emp-1'])
+    saved.save(str(tmp_path / 'faces.npz'))
+
+    backend = LocalBackend(dim=128)
+    backend.load(str(tmp_path / 'faces.npz'))
+    response = backend.search_faces_by_image(CollectionId='c', Image={'Bytes': b'jpeg'}, FaceMatchThreshold=0)
+    assert backend.dim == 8
+    assert len(response['FaceMatches']) == 1
+    result = backend.search_faces_by_image(CollectionId='c', Image=npy(np.eye(8)[1]), FaceMatchThreshold=90)
+    assert result['FaceMatches'][0]['Face']['ExternalImageId'] == 'emp-1'
+
+
+def test_probe_of_wrong_size_is_rejected():
+    backend = LocalBackend(dim=8)
+    with pytest.raises(ClientError) as error:
+        backend.search_faces_by_image(CollectionId='c', Image=npy(np.ones(16)))
+    assert error.value.response['Error']['Code'] == 'InvalidImageFormatException'
+    assert '16 values' in str(error.value)
+
+
+def test_search_without_face_raises_invalid_parameter():
+    backend = LocalBackend(dim=8)
+    assert backend.detect_faces(Image=npy(np.zeros(8)))['FaceDetails'] == []
+    with pytest.raises(ClientError) as error:
+        backend.search_faces_by_image(CollectionId='c', Image=npy(np.zeros(8)))
+    assert error.value.response['Error']['Code'] == 'InvalidParameterException'
@@ -0,0 +1,102 @@
+import time
+
+import pytest
+
+from match_cache import MatchCache, bump_collection_version
+
+COLLECTION = 'employeeFaces'
+
+
+class StubTable:
+    """In-memory FaceMatchCache table keyed by CacheKey"""
+
+    def __init__(self):
+        self.items = {}
+
+    def get_item(self, Key, ConsistentRead=False):
+        item = self.items.get(Key['CacheKey'])
+        return {'Item': dict(item)} if item else {}
+
+    def put_item(self, Item):
+        self.items[Item['CacheKey']] = dict(Item)
+
+    def update_item(self, Key, UpdateExpression, ExpressionAttributeValues, ReturnValues):
+        item = self.items.setdefault(Key['CacheKey'], dict(Key))
+        item['Version'] = item.get('Version', 0) + ExpressionAttributeValues[':one']
+        return {'Attributes': {'Version': item['Version']}}
+
+
+class StubDynamoResource:
+    def __init__(self):
+        self.table = StubTable()
+        self.unprocessed = False
+
+    def Table(self, name):
+        return self.table
+
+    def batch_get_item(self, RequestItems):
+        (table_name, request), = RequestItems.items()
+        if self.unprocessed:
+            return {'Responses': {}, 'UnprocessedKeys': RequestItems}
+        found = [self.table.items[key['CacheKey']] for key in request['Keys'] if key['CacheKey'] in self.table.items]
+        return {'Responses': {table_name: [dict(item) for item in found]}, 'UnprocessedKeys': {}}
+
+
+UNMATCHED = (False, 'No match found', 0)
+MATCHED = (True, 'emp-1', 99.5)
+
+
+@pytest.mark.parametrize('use_dynamodb', [False, True])
+def test_unmatched_result_not_served_after_version_bump(use_dynamodb):
+    dynamodb = StubDynamoResource()
+    cache = MatchCache(dynamodb, COLLECTION, use_dynamodb=use_dynamodb)
+    version, cached = cache.lookup('abc')
+    assert cached is None
+    cache.store('abc', version, UNMATCHED)
+    assert cache.lookup('abc') == (version, UNMATCHED)
+
+    # The employee in the image is enrolled
+    new_version = bump_collection_version(dynamodb.table, COLLECTION)
+    assert new_version == version + 1
+    assert cache.lookup('abc') == (new_version, None)
+    # Nor from a container that never saw the old result in memory
+    assert MatchCache(dynamodb, COLLECTION, use_dynamodb=use_dynamodb).lookup('abc') == (new_version, None)
+
+
+def test_lru_evicts_least_recently_used_entry():
+    cache = MatchCache(StubDynamoResource(), COLLECTION, size=2)
+    cache.store('a', 0, MATCHED)
+    cache.store('b', 0, UNMATCHED)
+    assert cache.lookup('a') == (0, MATCHED)  # 'a' is now the most recently used
+
+    cache.store('c', 0, MATCHED)
+    assert list(cache.entries) == ['a', 'c']
+    assert cache.lookup('b') == (0, None)
+    assert cache.hits == {'memory': 1, 'dynamodb': 0}
+
+
+def test_expired_dynamodb_entry_not_served():
+    dynamodb = StubDynamoResource()
+    MatchCache(dynamodb, COLLECTION, use_dynamodb=True).store('abc', 0, MATCHED)
+
+    # DynamoDB deletes expired items lazily, so the cache must check ExpiresAt
+    dynamodb.table.items['match#employeeFaces#abc']['ExpiresAt'] = int(time.time()) - 1
+    cache = MatchCache(dynamodb, COLLECTION, use_dynamodb=True)
+    assert cache.lookup('abc') == (0, None)
+
+    dynamodb.table.items['match#employeeFaces#abc']['ExpiresAt'] = int(time.time()) + 60
+    assert cache.lookup('abc') == (0, MATCHED)
+    assert cache.hits == {'memory': 0, 'dynamodb': 1}
+
+
+def test_unknown_version_is_neither_served_nor_stored():
+    dynamodb = StubDynamoResource()
+    cache = MatchCache(dynamodb, COLLECTION, use_dynamodb=True)
+    cache.store('abc', 0, MATCHED)
+
+    dynamodb.unprocessed = True
+    version, cached = cache.lookup('abc')
+    assert (version, cached) == (None, None)
+    cache.store('def', version, UNMATCHED)
+    assert 'def' not in cache.entries
+    assert 'match#employeeFaces#def' not in dynamodb.table.items
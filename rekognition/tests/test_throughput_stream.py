@@ -0,0 +1,96 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+
+pytest.importorskip('boto3')
+
+import throughput_stream  # noqa: E402
+from throughput_stream import MinuteCounter, RingBuffer, ThroughputAggregates, merge_summaries, percentile  # noqa: E402
+
+NOW = datetime(2026, 10, 19, 12, 30, 30, tzinfo=timezone.utc).timestamp()
+
+
+def at(seconds_ago):
+    return datetime.fromtimestamp(NOW - seconds_ago, timezone.utc)
+
+
+def test_ring_buffer_overwrites_oldest_values():
+    buffer = RingBuffer(3)
+    assert buffer.items() == []
+    for value in (1, 2):
+        buffer.append(value)
+    assert buffer.items() == [1, 2]
+    for value in (3, 4, 5):
+        buffer.append(value)
+    assert sorted(buffer.items()) == [3, 4, 5]
+    assert buffer.count == 5
+
+
+def test_minute_counter_reuses_slots_after_wrapping():
+    counter = MinuteCounter(3)
+    counter.add(at(0))
+    counter.add(at(0))
+    counter.add(at(60))
+    assert counter.series(NOW) == [0, 1, 2]
+
+    # Three minutes later the same slot holds a new minute
+    later = NOW + 180
+    counter.add(datetime.fromtimestamp(later, timezone.utc))
+    assert counter.series(later) == [0, 0, 1]
+
+
+def test_minute_counter_ignores_arrivals_older_than_the_window():
+    counter = MinuteCounter(3)
+    counter.add(at(0))
+    counter.add(at(180))  # Maps to the current minute's slot
+    assert counter.series(NOW) == [0, 0, 1]
+    counter.add(at(600))
+    assert counter.series(NOW) == [0, 0, 1]
+
+
+def test_percentile_is_nearest_rank():
+    values = [5, 1, 4, 2, 3]
+    assert percentile(values, 0.0) == 1
+    assert percentile(values, 0.5) == 3
+    assert percentile(values, 1.0) == 5
+    assert percentile([7], 0.99) == 7
+    assert percentile(list(range(1, 101)), 0.99) == 99
+
+
+def test_errors_count_as_arrivals_only():
+    aggregates = ThroughputAggregates()
+    event_time = at(30).isoformat().replace('+00:00', 'Z')
+    for status in ('MATCHED', 'UNMATCHED', 'NO_FACE', 'ERROR'):
+        aggregates.observe({
+            'MatchStatus': status,
+            'CameraId': 'front-door',
+            'EventTime': event_time,
+            'UploadToDecisionMs': Decimal('100')
+        })
+
+    summary = aggregates.summary(NOW)
+    assert summary['ArrivalsLastHour'] == 4
+    assert summary['StatusCounts'] == {'MATCHED': 1, 'UNMATCHED': 1, 'NO_FACE': 1, 'ERROR': 1}
+    assert summary['UploadToDecisionMs']['samples'] == 3
+    assert summary['MatchRateByCamera']['front-door'] == {'rate': Decimal('0.500'), 'matched': 1, 'samples': 2}
+
+
+def test_merge_adds_containers_and_marks_partial_window(monkeypatch):
+    aggregates = ThroughputAggregates()
+    aggregates.observe({'MatchStatus': 'MATCHED', 'CameraId': 'lobby',
+                        'EventTime': at(0).isoformat(), 'UploadToDecisionMs': Decimal('80')})
+    monkeypatch.setattr(throughput_stream, 'CONTAINER_ID', 'old')
+    monkeypatch.setattr(throughput_stream, 'CONTAINER_STARTED', NOW - 7200)
+    old = aggregates.summary(NOW)
+    monkeypatch.setattr(throughput_stream, 'CONTAINER_ID', 'new')
+    monkeypatch.setattr(throughput_stream, 'CONTAINER_STARTED', NOW - 60)
+    new = aggregates.summary(NOW)
+    assert not old['PartialWindow'] and new['PartialWindow']
+
+    merged = merge_summaries([old, new], NOW)
+    assert merged['ArrivalsLastHour'] == 2
+    assert merged['MatchRateByCamera'] == {'lobby': {'rate': 1.0, 'samples': 2}}
+    assert set(merged['UploadToDecisionMsByContainer']) == {'old', 'new'}
+    assert not merged['PartialWindow']
+    assert merge_summaries([new], NOW)['PartialWindow']
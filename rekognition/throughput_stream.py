@@ -0,0 +1,305 @@
+import json
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import boto3
+from boto3.dynamodb.types import TypeDeserializer
+
+from face_results import parse_timestamp
+from s3_uri import parse_s3_uri
+
+# DynamoDB Streams consumer for FaceMetadata (deployed as FaceThroughputMonitor).
+# Keeps rolling aggregates in memory, in fixed-size ring buffers, across warm
+# invocations:
+#   arrivals per minute over the last hour (by S3 upload time), including
+#     NO_FACE and ERROR uploads
+#   upload-to-decision p50/p99 over the last LATENCY_WINDOW decisions
+#   match rate per camera over each camera's last CAMERA_WINDOW face decisions
+# Several containers can run at once (one per stream shard) and a recycled
+# container starts empty, so every container writes its own item,
+# FaceId = SUMMARY_KEY#<container>, and adds that key to the string set
+# Containers on the SUMMARY_KEY item. read_summary() merges the containers'
+# items with one GetItem and one BatchGetItem; nothing ever scans the table.
+# Items from a container that started less than an hour ago are marked
+# PartialWindow. The merged summary can also be written to SUMMARY_S3_URI.
+
+DYNAMO_TABLE = os.environ.get('DYNAMO_TABLE', 'FaceMetadata')
+SUMMARY_KEY = os.environ.get('SUMMARY_KEY', 'summary#throughput')
+SUMMARY_INTERVAL_SECONDS = int(os.environ.get('SUMMARY_INTERVAL_SECONDS', '60'))
+SUMMARY_S3_URI = os.environ.get('SUMMARY_S3_URI', '')
+UPLOAD_BUCKET = os.environ.get('UPLOAD_BUCKET', 'rekognition-upload-bucket1')
+LATENCY_WINDOW = int(os.environ.get('LATENCY_WINDOW', '1024'))
+CAMERA_WINDOW = int(os.environ.get('CAMERA_WINDOW', '256'))
+ARRIVAL_MINUTES = 60
+CONTAINER_ID = uuid.uuid4().hex[:12]
+CONTAINER_STARTED = time.time()
+
+dynamodb = boto3.resource('dynamodb', region_name='us-east-2')
+s3 = boto3.client('s3', region_name='us-east-2') if SUMMARY_S3_URI else None
+_deserializer = TypeDeserializer()
+
+
+class RingBuffer:
+    """Fixed-size buffer of numbers that overwrites its oldest value"""
+
+    def __init__(self, size):
+        self.values = [0.0] * size
+        self.size = size
+        self.count = 0
+
+    def append(self, value):
+        self.values[self.count % self.size] = value
+        self.count += 1
+
+    def items(self):
+        return self.values[:min(self.count, self.size)]
+
+
+class MinuteCounter:
+    """Counts per minute for the last `minutes` minutes, one slot per minute"""
+
+    def __init__(self, minutes):
+        self.slot_minutes = [-1] * minutes
+        self.counts = [0] * minutes
+
+    def add(self, timestamp):
+        minute = int(timestamp.timestamp() // 60)
+        slot = minute % len(self.counts)
+        if self.slot_minutes[slot] > minute:
+            return  # Older than the window
+        if self.slot_minutes[slot] != minute:
+            self.slot_minutes[slot] = minute
+            self.counts[slot] = 0
+        self.counts[slot] += 1
+
+    def series(self, now):
+        """Counts for each of the last minutes, oldest first, ending with the current one"""
+        current = int(now // 60)
+        minutes = range(current - len(self.counts) + 1, current + 1)
+        return [
+            self.counts[minute % len(self.counts)] if self.slot_minutes[minute % len(self.counts)] == minute else 0
+            for minute in minutes
+        ]
+
+    def by_minute(self, now):
+        """Non-zero counts in the window keyed by their minute's ISO timestamp"""
+        first = int(now // 60) - len(self.counts) + 1
+        return {
+            iso_time(minute * 60): count
+            for minute, count in enumerate(self.series(now), start=first) if count
+        }
+
+
+def iso_time(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat(timespec='seconds').replace('+00:00', 'Z')
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+class ThroughputAggregates:
+    def __init__(self):
+        self.arrivals = MinuteCounter(ARRIVAL_MINUTES)
+        self.latencies = RingBuffer(LATENCY_WINDOW)
+        self.cameras = {}
+        self.statuses = {}
+        self.records = 0
+        self.stream_lag_seconds = 0.0
+
+    def observe(self, item):
+        """Fold one FaceMetadata item into the aggregates"""
+        self.records += 1
+        status = item.get('MatchStatus', 'UNKNOWN')
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        arrival = item.get('EventTime')
+        if not arrival or arrival == 'unknown':
+            arrival = item.get('DecisionTime')
+        if arrival:
+            self.arrivals.add(parse_timestamp(arrival))
+        # Failed uploads count as arrivals only
+        if status == 'ERROR':
+            return
+        if 'UploadToDecisionMs' in item:
+            self.latencies.append(float(item['UploadToDecisionMs']))
+        if status in ('MATCHED', 'UNMATCHED'):
+            camera = item.get('CameraId', 'default')
+            if camera not in self.cameras:
+                self.cameras[camera] = RingBuffer(CAMERA_WINDOW)
+            self.cameras[camera].append(1.0 if status == 'MATCHED' else 0.0)
+
+    def summary(self, now):
+        """This container's summary item; numbers are Decimal for DynamoDB"""
+        arrivals = self.arrivals.by_minute(now)
+        latencies = self.latencies.items()
+        window_start = max(CONTAINER_STARTED, now - ARRIVAL_MINUTES * 60)
+        summary = {
+            'FaceId': f'{SUMMARY_KEY}#{CONTAINER_ID}',
+            'ContainerId': CONTAINER_ID,
+            'StartedAt': iso_time(CONTAINER_STARTED),
+            'UpdatedAt': iso_time(now),
+            # Arrivals before WindowStart were seen by another (or no) container
+            'WindowStart': iso_time(window_start),
+            'PartialWindow': window_start > now - ARRIVAL_MINUTES * 60,
+            'RecordsSeen': self.records,
+            'StatusCounts': dict(self.statuses),
+            'ArrivalsPerMinute': arrivals,
+            'ArrivalsLastHour': sum(arrivals.values()),
+            'StreamLagSeconds': Decimal(f'{self.stream_lag_seconds:.1f}'),
+            'UploadToDecisionMs': {
+                'p50': Decimal(f'{percentile(latencies, 0.50):.1f}') if latencies else Decimal('0'),
+                'p99': Decimal(f'{percentile(latencies, 0.99):.1f}') if latencies else Decimal('0'),
+                'samples': len(latencies)
+            },
+            'MatchRateByCamera': {
+                camera: {
+                    'rate': Decimal(f'{sum(outcomes.items()) / len(outcomes.items()):.3f}'),
+                    'matched': int(sum(outcomes.items())),
+                    'samples': len(outcomes.items())
+                }
+                for camera, outcomes in self.cameras.items()
+            }
+        }
+        return summary
+
+
+def merge_summaries(items, now):
+    """Combine container summary items into one view of the last hour
+
+    Arrivals, status counts and per-camera match counts add up exactly.
+    Latency percentiles cannot be merged, so they are listed per container.
+    """
+    cutoff = iso_time((int(now // 60) - ARRIVAL_MINUTES + 1) * 60)
+    arrivals = {}
+    statuses = {}
+    cameras = {}
+    for item in items:
+        for minute, count in item.get('ArrivalsPerMinute', {}).items():
+            if minute >= cutoff:
+                arrivals[minute] = arrivals.get(minute, 0) + int(count)
+        for status, count in item.get('StatusCounts', {}).items():
+            statuses[status] = statuses.get(status, 0) + int(count)
+        for camera, outcome in item.get('MatchRateByCamera', {}).items():
+            matched, samples = cameras.get(camera, (0, 0))
+            cameras[camera] = (matched + int(outcome['matched']), samples + int(outcome['samples']))
+
+    oldest_start = min((item['StartedAt'] for item in items), default=iso_time(now))
+    return {
+        'UpdatedAt': iso_time(now),
+        'Containers': len(items),
+        'PartialWindow': oldest_start > iso_time(now - ARRIVAL_MINUTES * 60),
+        'StatusCounts': statuses,
+        'ArrivalsPerMinute': dict(sorted(arrivals.items())),
+        'ArrivalsLastHour': sum(arrivals.values()),
+        'StreamLagSeconds': max((float(item['StreamLagSeconds']) for item in items), default=0.0),
+        'UploadToDecisionMsByContainer': {
+            item['ContainerId']: {name: float(value) for name, value in item['UploadToDecisionMs'].items()}
+            for item in items
+        },
+        'MatchRateByCamera': {
+            camera: {'rate': round(matched / samples, 3), 'samples': samples}
+            for camera, (matched, samples) in cameras.items()
+        }
+    }
+
+
+_aggregates = ThroughputAggregates()
+_last_write = 0.0
+
+
+def read_summary(now=None):
+    """Merge the summaries of every container updated within the last hour"""
+    now = now or time.time()
+    table = dynamodb.Table(DYNAMO_TABLE)
+    keys = sorted(table.get_item(Key={'FaceId': SUMMARY_KEY}).get('Item', {}).get('Containers', []))
+    items = []
+    for start in range(0, len(keys), 100):
+        request = {DYNAMO_TABLE: {'Keys': [{'FaceId': key} for key in keys[start:start + 100]]}}
+        while request:
+            response = dynamodb.batch_get_item(RequestItems=request)
+            items.extend(response['Responses'].get(DYNAMO_TABLE, []))
+            request = response.get('UnprocessedKeys')
+
+    cutoff = iso_time(now - ARRIVAL_MINUTES * 60)
+    stale = [item for item in items if item['UpdatedAt'] < cutoff]
+    missing = set(keys) - {item['FaceId'] for item in items}
+    if stale or missing:
+        # Recycled containers: nothing of theirs is left in the window
+        for item in stale:
+            table.delete_item(Key={'FaceId': item['FaceId']})
+        table.update_item(
+            Key={'FaceId': SUMMARY_KEY},
+            UpdateExpression='DELETE Containers :stale',
+            ExpressionAttributeValues={':stale': {item['FaceId'] for item in stale} | missing}
+        )
+    return merge_summaries([item for item in items if item['UpdatedAt'] >= cutoff], now)
+
+
+def write_summary(summary):
+    table = dynamodb.Table(DYNAMO_TABLE)
+    table.put_item(Item=summary)
+    # Re-added on every write, as read_summary() may have pruned an idle container
+    table.update_item(
+        Key={'FaceId': SUMMARY_KEY},
+        UpdateExpression='ADD Containers :key',
+        ExpressionAttributeValues={':key': {summary['FaceId']}}
+    )
+    if SUMMARY_S3_URI:
+        bucket, prefix = parse_s3_uri(SUMMARY_S3_URI)
+        if bucket == UPLOAD_BUCKET:
+            # An object there would be processed as a door image
+            print(f"Summary upload skipped: {bucket} is the upload bucket.")
+            return
+        key = f"{prefix}/throughput.json" if prefix else "throughput.json"
+        s3.put_object(
+            Bucket=bucket,
+            Key=key,
+            Body=json.dumps(read_summary(), default=float).encode(),
+            ContentType='application/json'
+        )
+
+
+def lambda_handler(event, context):
+    global _last_write
+    processed = 0
+    newest = None
+    for record in event.get('Records', []):
+        if record.get('eventName') not in ('INSERT', 'MODIFY'):
+            continue
+        image = record.get('dynamodb', {}).get('NewImage')
+        if not image:
+            continue
+        item = {name: _deserializer.deserialize(value) for name, value in image.items()}
+        # Skip the summary items (also dropped by the event source mapping's filter)
+        if 'ImageKey' not in item:
+            continue
+        try:
+            _aggregates.observe(item)
+            processed += 1
+        except Exception as e:
+            print(f"Skipping record {item.get('FaceId')}: {str(e)}")
+        created = record['dynamodb'].get('ApproximateCreationDateTime')
+        if created:
+            newest = max(newest or 0, float(created))
+
+    now = time.time()
+    if newest:
+        _aggregates.stream_lag_seconds = max(0.0, now - newest)
+    if now - _last_write >= SUMMARY_INTERVAL_SECONDS:
+        try:
+            write_summary(_aggregates.summary(now))
+            _last_write = now
+            print(f"Throughput summary written ({_aggregates.records} records seen).")
+        except Exception as e:
+            print(f"Failed to write throughput summary: {str(e)}")
+
+    return {'statusCode': 200, 'body': json.dumps({'processed': processed})}
+
+
+if __name__ == "__main__":
+    print(json.dumps(read_summary(), default=float, indent=2))
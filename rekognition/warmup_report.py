@@ -0,0 +1,138 @@
+import argparse
+import base64
+import io
+import json
+import re
+import statistics
+import time
+import zipfile
+
+import boto3
+
+from deploy_lambda import LAMBDA_MODULES, get_role_arn, lambda_environment
+
+# Compares first-request latency of the face handler with warming off and on.
+# The report never touches the production FaceProcessor: it deploys the current
+# code as a separate function whose handler (dry_run_handler.py) skips the
+# FaceMetadata write and the SNS alert. Every trial forces a fresh execution
+# environment of that function by changing an environment variable, then
+# invokes it with an S3 event for an existing image:
+#   off  the image event is the first request the new container sees
+#   on   a {"warmup": true} event is sent first, as the warm-up schedule does
+# The test function is deleted afterwards unless --keep-function is given.
+
+lambda_client = boto3.client('lambda', region_name='us-east-2')
+
+FUNCTION_NAME = 'FaceProcessor-warmup-test'
+NONCE_VARIABLE = 'WARMUP_REPORT_NONCE'
+
+
+def test_environment():
+    """Production settings minus the match cache, whose table is shared"""
+    variables = lambda_environment()['Variables']
+    return {'Variables': {name: value for name, value in variables.items() if not name.startswith('MATCH_CACHE')}}
+
+
+def deploy_test_function():
+    """Create or update the test function from the code in this directory"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as z:
+        z.write('lambda-func.py', 'lambda_function.py')
+        for module_file in LAMBDA_MODULES + ['dry_run_handler.py']:
+            z.write(module_file, module_file)
+    settings = {
+        'Handler': 'dry_run_handler.lambda_handler',
+        'Timeout': 30,
+        'MemorySize': 256,
+        'Environment': test_environment()
+    }
+    try:
+        lambda_client.create_function(
+            FunctionName=FUNCTION_NAME,
+            Runtime='python3.9',
+            Role=get_role_arn(),
+            Code={'ZipFile': buffer.getvalue()},
+            **settings
+        )
+        lambda_client.get_waiter('function_active_v2').wait(FunctionName=FUNCTION_NAME)
+    except lambda_client.exceptions.ResourceConflictException:
+        lambda_client.update_function_code(FunctionName=FUNCTION_NAME, ZipFile=buffer.getvalue())
+        lambda_client.get_waiter('function_updated').wait(FunctionName=FUNCTION_NAME)
+        lambda_client.update_function_configuration(FunctionName=FUNCTION_NAME, **settings)
+        lambda_client.get_waiter('function_updated').wait(FunctionName=FUNCTION_NAME)
+    print(f"Test function '{FUNCTION_NAME}' deployed (dry run: no DynamoDB writes or SNS alerts).")
+
+
+def force_cold_start():
+    """Change the function configuration so the next invocation starts a new container"""
+    config = lambda_client.get_function_configuration(FunctionName=FUNCTION_NAME)
+    variables = config.get('Environment', {}).get('Variables', {})
+    variables[NONCE_VARIABLE] = str(time.time_ns())
+    lambda_client.update_function_configuration(FunctionName=FUNCTION_NAME, Environment={'Variables': variables})
+    lambda_client.get_waiter('function_updated').wait(FunctionName=FUNCTION_NAME)
+
+
+def delete_test_function():
+    try:
+        lambda_client.delete_function(FunctionName=FUNCTION_NAME)
+        print(f"Test function '{FUNCTION_NAME}' deleted.")
+    except lambda_client.exceptions.ResourceNotFoundException:
+        pass
+
+
+def invoke(payload):
+    """Invoke synchronously and return (wall_ms, init_ms, duration_ms)"""
+    start = time.perf_counter()
+    response = lambda_client.invoke(
+        FunctionName=FUNCTION_NAME,
+        Payload=json.dumps(payload).encode(),
+        LogType='Tail'
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    response['Payload'].read()
+    log = base64.b64decode(response.get('LogResult', '')).decode(errors='replace')
+    init = re.search(r'Init Duration: ([\d.]+) ms', log)
+    duration = re.search(r'\tDuration: ([\d.]+) ms', log)
+    return wall_ms, float(init.group(1)) if init else 0.0, float(duration.group(1)) if duration else 0.0
+
+
+def run_report(bucket, key, trials, warmup_delay, keep_function=False):
+    image_event = {'Records': [{'s3': {'bucket': {'name': bucket}, 'object': {'key': key}}}]}
+    results = {'off': [], 'on': []}
+    try:
+        deploy_test_function()
+        for trial in range(1, trials + 1):
+            for mode in ('off', 'on'):
+                force_cold_start()
+                if mode == 'on':
+                    invoke({'warmup': True})
+                    time.sleep(warmup_delay)
+                wall_ms, init_ms, duration_ms = invoke(image_event)
+                results[mode].append(wall_ms)
+                print(f"trial {trial} warming {mode:<3}  first request {wall_ms:8.1f} ms  "
+                      f"(init {init_ms:7.1f} ms, handler {duration_ms:7.1f} ms)")
+    finally:
+        if not keep_function:
+            delete_test_function()
+
+    print("\nFirst-request latency (client round trip)")
+    print(f"{'warming':<8} {'median ms':>10} {'min ms':>10} {'max ms':>10}")
+    for mode, samples in results.items():
+        print(f"{mode:<8} {statistics.median(samples):>10.1f} {min(samples):>10.1f} {max(samples):>10.1f}")
+    saved = statistics.median(results['off']) - statistics.median(results['on'])
+    print(f"\nWarming saves {saved:.1f} ms on the median first request.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare first-request latency with warming on and off, on a dry-run copy of FaceProcessor"
+    )
+    parser.add_argument('--bucket', default='rekognition-upload-bucket1')
+    parser.add_argument('--key', required=True, help="Existing test image in the bucket")
+    parser.add_argument('--trials', type=int, default=5)
+    parser.add_argument('--warmup-delay', type=float, default=1.0,
+                        help="Seconds between the warm-up event and the image event")
+    parser.add_argument('--keep-function', action='store_true',
+                        help=f"Leave {FUNCTION_NAME} deployed after the report")
+    args = parser.parse_args()
+    run_report(args.bucket, args.key, args.trials, args.warmup_delay, args.keep_function)